@@ -0,0 +1,100 @@
+"""Tests for the ECAPAModel class."""
+
+import numpy as np
+import torch
+from unittest.mock import Mock, patch
+from yova_core.voice_id.ecapa_model import ECAPAModel, resample_polyphase
+
+
+class _FakeEncoder:
+    """Stand-in for the SpeechBrain encoder that only looks at the unpadded samples."""
+
+    def encode_batch(self, wavs, wav_lens=None):
+        if wav_lens is None:
+            wav_lens = torch.ones(wavs.shape[0])
+        rows = []
+        for wav, relative_length in zip(wavs, wav_lens):
+            valid = wav[:int(round(float(relative_length) * wavs.shape[1]))]
+            rows.append(torch.stack([valid.mean(), valid.abs().max(), valid.std(), torch.tensor(1.0)]))
+        return torch.stack(rows).unsqueeze(1)
+
+
+class TestECAPAModel:
+    """Test cases for the ECAPAModel class."""
+
+    def _create_model(self, **kwargs):
+        """Helper method to create an ECAPAModel with a fake encoder instead of SpeechBrain."""
+        with patch.object(ECAPAModel, "_load_model"):
+            model = ECAPAModel(Mock(), **kwargs)
+        model.model = _FakeEncoder()
+        model.device = torch.device("cpu")
+        return model
+
+    def test_batch_embeddings_match_single_embeddings(self):
+        """Test batched extraction with padding returns the same embeddings as one clip at a time."""
+        model = self._create_model(enable_vad=False)
+        rng = np.random.default_rng(0)
+        audios = [rng.uniform(-0.5, 0.5, length).astype(np.float32) for length in (16000, 8000, 12000)]
+
+        batch = model.extract_embeddings_batch(audios, 16000, batch_size=2)
+
+        assert len(batch) == len(audios)
+        for audio, embedding in zip(audios, batch):
+            np.testing.assert_allclose(embedding, model.extract_embedding(audio, 16000), atol=1e-5)
+            assert abs(np.linalg.norm(embedding) - 1.0) < 1e-5
+
+    def test_batch_without_model_returns_empty_embeddings(self):
+        """Test batched extraction reports failures per clip when no model is loaded."""
+        model = self._create_model()
+        model.model = None
+
+        assert [len(embedding) for embedding in model.extract_embeddings_batch([np.zeros(160, dtype=np.float32)], 16000)] == [0]
+
+    def test_moving_energy_matches_convolution(self):
+        """Test the prefix-sum moving energy matches the centered convolution it replaces."""
+        model = self._create_model()
+        audio = np.random.default_rng(1).uniform(-1.0, 1.0, 4000).astype(np.float32)
+
+        for win in (1, 4, 5, 480):
+            expected = np.convolve(audio ** 2, np.ones(win, dtype=np.float32), mode='same')
+            np.testing.assert_allclose(model._moving_energy(audio, win), expected, rtol=1e-4, atol=1e-3)
+
+    def test_tensor_input_matches_array_input(self):
+        """Test tensor audio gives the same embedding as NumPy audio, with and without preprocessing."""
+        audio = np.random.default_rng(2).uniform(-0.5, 0.5, 32000).astype(np.float32)
+
+        for model in (self._create_model(enable_vad=False), self._create_model(max_seconds=1.0)):
+            for sr in (16000, 8000):
+                np.testing.assert_allclose(model.extract_embedding(torch.from_numpy(audio), sr),
+                                           model.extract_embedding(audio, sr), atol=1e-6)
+
+    def test_embedding_config_tracks_preprocessing_settings(self):
+        """Test the embedding config changes with the model source and preprocessing settings."""
+        default = self._create_model().embedding_config()
+
+        assert self._create_model().embedding_config() == default
+        assert self._create_model(model_path="custom/ecapa").embedding_config() != default
+        assert self._create_model(enable_vad=False).embedding_config() != default
+        assert self._create_model(max_seconds=3.0).embedding_config() != default
+
+    def test_longest_voiced_run(self):
+        """Test the edge-based run search finds the first longest voiced run."""
+        model = self._create_model()
+
+        for flags, expected in [([], (0, 0)), ([0, 0, 0], (0, 0)), ([1, 1, 1], (0, 3)),
+                                ([0, 1, 1, 0, 1, 1, 1, 0], (4, 7)), ([1, 1, 0, 1, 1], (0, 2)), ([0, 0, 1], (2, 3))]:
+            assert model._longest_voiced_run(np.array(flags, dtype=np.int8)) == expected
+
+
+def test_resample_polyphase_filters_aliasing():
+    """Test polyphase resampling keeps in-band tones and removes tones above the new Nyquist frequency."""
+    t = np.arange(48000, dtype=np.float32) / 48000
+    in_band = np.sin(2 * np.pi * 1000 * t).astype(np.float32)
+    out_of_band = np.sin(2 * np.pi * 10000 * t).astype(np.float32)
+
+    resampled_in_band = resample_polyphase(in_band, 48000, 16000)
+    resampled_out_of_band = resample_polyphase(out_of_band, 48000, 16000)
+
+    assert resampled_in_band.dtype == np.float32 and len(resampled_in_band) == 16000
+    assert np.sqrt(np.mean(resampled_in_band[100:-100] ** 2)) > 0.65
+    assert np.sqrt(np.mean(resampled_out_of_band[100:-100] ** 2)) < 0.05
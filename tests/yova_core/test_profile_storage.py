@@ -0,0 +1,113 @@
+"""Tests for the ProfileStorage class."""
+
+import gzip
+import subprocess
+import sys
+import pickle
+import numpy as np
+from pathlib import Path
+from yova_core.voice_id.profile_storage import ProfileStorage
+
+
+class TestProfileStorage:
+    """Test cases for the ProfileStorage class."""
+
+    def test_profile_path_sanitizes_speaker_id(self, tmp_path):
+        """Test that unsafe characters are stripped from profile file names."""
+        storage = ProfileStorage(str(tmp_path))
+
+        assert storage._get_profile_path("al/ice!").name == "alice.pkl.gz"
+
+    def test_profile_path_fallback_is_stable_across_processes(self, tmp_path):
+        """Test that ids without safe characters map to the same file in every process."""
+        code = (
+            "from yova_core.voice_id.profile_storage import ProfileStorage;"
+            f"print(ProfileStorage({str(tmp_path)!r})._get_profile_path('!!!').name)"
+        )
+        names = {
+            subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                           cwd=Path(__file__).parent.parent.parent).stdout.strip()
+            for _ in range(2)
+        }
+
+        assert names == {ProfileStorage(str(tmp_path))._get_profile_path("!!!").name}
+        assert names.pop().startswith("speaker_")
+
+    def test_cleanup_keeps_profiles_of_enrolled_speakers(self, tmp_path):
+        """Test cleanup matches files by sanitized speaker id and removes only orphans."""
+        storage = ProfileStorage(str(tmp_path))
+        embeddings = [np.ones(4, dtype=np.float32)]
+        storage.save_profile("al ice", embeddings)
+        storage.save_profile("bob", embeddings)
+
+        assert storage.cleanup_orphaned_profiles({"al ice": embeddings}) == 1
+        assert storage.profile_exists_on_disk("al ice")
+        assert not storage.profile_exists_on_disk("bob")
+
+    def test_profiles_are_saved_compressed(self, tmp_path):
+        """Test profiles are written gzip-compressed and load back unchanged."""
+        storage = ProfileStorage(str(tmp_path))
+        embeddings = [np.arange(192, dtype=np.float32), np.ones(192, dtype=np.float32)]
+
+        assert storage.save_profile("alice", embeddings)
+
+        with open(tmp_path / "alice.pkl.gz", "rb") as f:
+            assert f.read(2) == b"\x1f\x8b"
+        loaded = storage.load_all_profiles()
+        np.testing.assert_array_equal(np.stack(loaded["alice"]), np.stack(embeddings))
+
+    def test_embeddings_are_stored_as_one_matrix(self, tmp_path):
+        """Test embeddings are pickled as a single float32 matrix."""
+        storage = ProfileStorage(str(tmp_path))
+        embeddings = [np.arange(192, dtype=np.float64), np.ones(192, dtype=np.float64)]
+
+        assert storage.save_profile("alice", embeddings)
+
+        with gzip.open(tmp_path / "alice.pkl.gz", "rb") as f:
+            stored = pickle.load(f)["embeddings"]
+        assert isinstance(stored, np.ndarray)
+        assert stored.shape == (2, 192) and stored.dtype == np.float32
+
+    def test_legacy_profiles_are_loaded_and_replaced(self, tmp_path):
+        """Test uncompressed profiles from older versions are read and superseded on save."""
+        storage = ProfileStorage(str(tmp_path))
+        embeddings = [np.ones(4, dtype=np.float32)]
+        with open(tmp_path / "alice.pkl", "wb") as f:
+            pickle.dump({'speaker_id': "alice", 'embeddings': embeddings}, f)
+
+        assert storage.profile_exists_on_disk("alice")
+        assert list(storage.load_all_profiles()) == ["alice"]
+
+        assert storage.save_profile("alice", embeddings * 2)
+        assert not (tmp_path / "alice.pkl").exists()
+        assert len(storage.reload_profile("alice")[1]) == 2
+
+    def test_failed_save_keeps_previous_profile(self, tmp_path, monkeypatch):
+        """Test an interrupted save leaves the previous profile and legacy file intact and no temp files."""
+        storage = ProfileStorage(str(tmp_path))
+        embeddings = [np.ones(4, dtype=np.float32)]
+        assert storage.save_profile("alice", embeddings)
+        with open(tmp_path / "alice.pkl", "wb") as f:
+            pickle.dump({'speaker_id': "alice", 'embeddings': embeddings}, f)
+
+        def interrupted_dump(*args, **kwargs):
+            raise KeyboardInterrupt()
+
+        monkeypatch.setattr(pickle, "dump", interrupted_dump)
+        try:
+            storage.save_profile("alice", embeddings * 2)
+        except KeyboardInterrupt:
+            pass
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["alice.pkl", "alice.pkl.gz"]
+        assert len(storage.reload_profile("alice")[1]) == 1
+
+    def test_backup_copies_all_profiles(self, tmp_path):
+        """Test backup copies every profile file into the backup directory."""
+        storage = ProfileStorage(str(tmp_path / "users"))
+        for speaker_id in ("alice", "bob", "carol"):
+            storage.save_profile(speaker_id, [np.ones(4, dtype=np.float32)])
+
+        assert storage.backup_profiles(str(tmp_path / "backup"))
+
+        assert sorted(p.name for p in (tmp_path / "backup").iterdir()) == ["alice.pkl.gz", "bob.pkl.gz", "carol.pkl.gz"]
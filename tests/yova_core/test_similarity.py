@@ -0,0 +1,60 @@
+"""Tests for the speaker embedding similarity kernels."""
+
+import numpy as np
+import pytest
+from yova_core.voice_id import similarity
+
+
+def _unit_rows(rows, seed):
+    """Helper returning a matrix of random float32 unit rows."""
+    matrix = np.random.default_rng(seed).standard_normal((rows, 192)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "simsimd", "numba"])
+def test_similarities_match_numpy(monkeypatch, backend):
+    """Test every backend returns plain dot products of unit vectors."""
+    if backend == "simsimd" and similarity.simsimd is None:
+        pytest.skip("simsimd is not installed")
+    if backend == "numba":
+        # Numba is only loaded without SimSIMD, so load the kernel explicitly
+        kernel = similarity._load_numba_kernel()
+        if kernel is None:
+            pytest.skip("numba is not installed")
+        monkeypatch.setattr(similarity, "_similarity_vector_numba", kernel)
+    monkeypatch.setattr(similarity, "SIMSIMD_AVAILABLE", backend == "simsimd")
+    monkeypatch.setattr(similarity, "NUMBA_AVAILABLE", backend == "numba")
+    matrix = _unit_rows(5, 1)
+    tests = _unit_rows(3, 2)
+
+    np.testing.assert_allclose(similarity.similarity_vector(matrix, tests[0]), matrix @ tests[0], atol=1e-5)
+    np.testing.assert_allclose(similarity.similarity_matrix(tests[:1], matrix), tests[:1] @ matrix.T, atol=1e-5)
+    np.testing.assert_allclose(similarity.similarity_matrix(tests, matrix), tests @ matrix.T, atol=1e-5)
+
+
+def test_warm_up_compiles_numba_kernel(monkeypatch):
+    """Test warming up compiles the Numba kernel for read-only and writable matrices."""
+    kernel = similarity._load_numba_kernel()
+    if kernel is None:
+        pytest.skip("numba is not installed")
+    monkeypatch.setattr(similarity, "_similarity_vector_numba", kernel)
+    monkeypatch.setattr(similarity, "SIMSIMD_AVAILABLE", False)
+    monkeypatch.setattr(similarity, "NUMBA_AVAILABLE", True)
+
+    similarity.warm_up()
+
+    assert len(kernel.signatures) == 2
+
+
+@pytest.mark.parametrize("simsimd_available", [False, True])
+def test_quantized_similarities_approximate_float(monkeypatch, simsimd_available):
+    """Test int8 similarities with per-row scales stay close to full precision."""
+    if simsimd_available and similarity.simsimd is None:
+        pytest.skip("simsimd is not installed")
+    monkeypatch.setattr(similarity, "SIMSIMD_AVAILABLE", simsimd_available)
+    matrix = _unit_rows(5, 1)
+    tests = _unit_rows(3, 2)
+
+    for batch in (tests[:1], tests):
+        quantized = similarity.quantized_similarity_matrix(*similarity.quantize_int8(batch), *similarity.quantize_int8(matrix))
+        np.testing.assert_allclose(quantized, batch @ matrix.T, atol=5e-3)
@@ -0,0 +1,91 @@
+"""Tests for the SpeakerProfile class."""
+
+import numpy as np
+import pytest
+from yova_core.voice_id.speaker_profile import SpeakerProfile, INITIAL_SAMPLE_CAPACITY
+
+
+def _embeddings(count, seed=0):
+    """Helper generating random float32 embeddings."""
+    return np.random.default_rng(seed).standard_normal((count, 192)).astype(np.float32)
+
+
+class TestSpeakerProfile:
+    """Test cases for the SpeakerProfile class."""
+
+    def test_buffer_grows_past_initial_capacity(self):
+        """Test adding more samples than the initial capacity keeps every sample."""
+        profile = SpeakerProfile("alice")
+        embeddings = _embeddings(2 * INITIAL_SAMPLE_CAPACITY + 1)
+        for embedding in embeddings:
+            assert profile.add_embedding(embedding)
+
+        expected = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        assert profile.get_sample_count() == len(embeddings)
+        np.testing.assert_allclose(profile.get_embedding_matrix(), expected, atol=1e-6)
+
+    def test_remove_keeps_returned_views_unchanged(self):
+        """Test removing a sample does not modify matrices handed out before."""
+        profile = SpeakerProfile("alice")
+        for embedding in _embeddings(3):
+            profile.add_embedding(embedding)
+        before = profile.get_embedding_matrix()
+        snapshot = before.copy()
+
+        assert profile.remove_embedding(0)
+
+        np.testing.assert_array_equal(before, snapshot)
+        np.testing.assert_array_equal(profile.get_embedding_matrix(), snapshot[1:])
+        with pytest.raises(ValueError):
+            profile.get_embedding_matrix()[0, 0] = 0.0
+
+    def test_rejects_mismatched_dimension(self):
+        """Test embeddings with a different dimension are rejected."""
+        profile = SpeakerProfile("alice")
+        profile.add_embedding(_embeddings(1)[0])
+
+        assert not profile.add_embedding(np.ones(10, dtype=np.float32))
+        assert profile.get_sample_count() == 1
+
+    def test_add_embeddings_matches_individual_adds(self):
+        """Test bulk adding gives the same samples and centroid as adding one at a time."""
+        embeddings = _embeddings(INITIAL_SAMPLE_CAPACITY + 3)
+        embeddings[2] = 0.0
+        single = SpeakerProfile("alice")
+        for embedding in embeddings:
+            single.add_embedding(embedding)
+        bulk = SpeakerProfile("alice")
+        bulk.add_embedding(embeddings[0])
+
+        assert bulk.add_embeddings(list(embeddings[1:])) == len(embeddings) - 2
+        np.testing.assert_allclose(bulk.get_embedding_matrix(), single.get_embedding_matrix(), atol=1e-6)
+        np.testing.assert_allclose(bulk.get_averaged_embedding(), single.get_averaged_embedding(), atol=1e-6)
+
+    def test_averaged_embedding_of_cancelling_samples_is_none(self):
+        """Test samples summing to zero give no averaged embedding instead of NaNs."""
+        profile = SpeakerProfile("alice")
+        embedding = _embeddings(1)[0]
+        profile.add_embedding(embedding)
+        profile.add_embedding(-embedding)
+
+        assert profile.get_averaged_embedding() is None
+
+        profile.add_embedding(embedding)
+        averaged = profile.get_averaged_embedding()
+        np.testing.assert_allclose(averaged, embedding / np.linalg.norm(embedding), atol=1e-6)
+
+    def test_embedding_stats_follow_profile_changes(self):
+        """Test cached embedding statistics are refreshed after samples change."""
+        profile = SpeakerProfile("alice")
+        embeddings = _embeddings(4)
+        for embedding in embeddings[:3]:
+            profile.add_embedding(embedding)
+        units = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+        stats = profile.get_embedding_stats()
+        assert stats["count"] == 3
+        assert stats["mean_norm"] == pytest.approx(1.0, abs=1e-6)
+        assert stats["variance"] == pytest.approx(units[:3].var(axis=0).mean(), rel=1e-4)
+
+        profile.add_embedding(embeddings[3])
+        assert profile.get_embedding_stats()["variance"] == pytest.approx(units.var(axis=0).mean(), rel=1e-4)
@@ -0,0 +1,370 @@
+"""Tests for the SpeakerVerifier class."""
+
+import gc
+import weakref
+import numpy as np
+import pytest
+from unittest.mock import Mock
+from yova_core.voice_id.speaker_verifier import SpeakerVerifier, confidence_level, confidence_levels
+
+
+EMBEDDING_DIM = 192
+
+
+def _unit(vector):
+    """Helper returning an L2-normalized float32 copy of a vector."""
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _speaker_embeddings(seed, count=3, noise=0.05):
+    """Helper generating a cluster of embeddings around a random speaker centroid."""
+    rng = np.random.default_rng(seed)
+    center = rng.standard_normal(EMBEDDING_DIM)
+    return [_unit(center + noise * rng.standard_normal(EMBEDDING_DIM)) for _ in range(count)]
+
+
+class TestSpeakerVerifier:
+    """Test cases for the SpeakerVerifier class."""
+
+    def _create_verifier(self, storage_dir=None, **kwargs):
+        """Helper method to create a SpeakerVerifier with a mock logger."""
+        return SpeakerVerifier(Mock(), storage_dir=storage_dir, **kwargs)
+
+    def test_enroll_and_verify(self):
+        """Test that an enrolled speaker verifies against its own embedding."""
+        verifier = self._create_verifier()
+        alice = _speaker_embeddings(1)
+        for embedding in alice:
+            assert verifier.enroll_speaker("alice", embedding)
+
+        is_match, similarity, confidence_level, _ = verifier.verify_speaker(alice[0], "alice")
+
+        assert is_match is True
+        assert similarity == pytest.approx(1.0, abs=0.05)
+        assert confidence_level == "high"
+        assert verifier.get_speaker_sample_count("alice") == 3
+
+    def test_verify_unknown_speaker(self):
+        """Test verification against a speaker that is not enrolled."""
+        verifier = self._create_verifier()
+
+        assert verifier.verify_speaker(_speaker_embeddings(1)[0], "nobody") == (False, 0.0, "unknown", 0.0)
+
+    def test_identify_speaker(self):
+        """Test identification picks the closest enrolled speaker."""
+        verifier = self._create_verifier()
+        alice = _speaker_embeddings(1, count=4)
+        bob = _speaker_embeddings(2, count=4)
+        for embedding in alice[:3]:
+            verifier.enroll_speaker("alice", embedding)
+        for embedding in bob[:3]:
+            verifier.enroll_speaker("bob", embedding)
+
+        speaker_id, similarity, confidence_level, _ = verifier.identify_speaker(bob[3])
+
+        assert speaker_id == "bob"
+        assert similarity > 0.9
+        assert confidence_level == "high"
+
+    def test_identify_without_speakers(self):
+        """Test identification when nobody is enrolled."""
+        verifier = self._create_verifier()
+
+        assert verifier.identify_speaker(_speaker_embeddings(1)[0]) == (None, 0.0, "unknown", 0.0)
+
+    def test_background_save_persists_profiles(self, tmp_path):
+        """Test that profiles saved in the background are reloaded by a new verifier."""
+        verifier = self._create_verifier(storage_dir=str(tmp_path))
+        alice = _speaker_embeddings(1)
+        for embedding in alice:
+            verifier.enroll_speaker("alice", embedding)
+        verifier.flush()
+
+        assert verifier.profile_exists_on_disk("alice")
+
+        reloaded = self._create_verifier(storage_dir=str(tmp_path))
+        assert reloaded.get_speaker_sample_count("alice") == 3
+
+    def test_close_writes_pending_saves_and_stops_worker(self, tmp_path):
+        """Test close() flushes queued saves, stops the save thread and later saves still reach disk."""
+        verifier = self._create_verifier(storage_dir=str(tmp_path))
+        alice, bob = _speaker_embeddings(1), _speaker_embeddings(2)
+        verifier.enroll_speaker("alice", alice[0])
+        save_thread = verifier._save_thread
+
+        verifier.close()
+        verifier.close()
+        verifier.enroll_speaker("bob", bob[0])
+
+        assert not save_thread.is_alive()
+        reloaded = self._create_verifier(storage_dir=str(tmp_path))
+        assert sorted(reloaded.get_enrolled_speakers()) == ["alice", "bob"]
+        reloaded.close()
+
+    def test_unused_verifier_is_garbage_collected(self, tmp_path):
+        """Test the save worker and exit hook do not keep a verifier alive."""
+        verifier = self._create_verifier(storage_dir=str(tmp_path))
+        verifier_ref = weakref.ref(verifier)
+        save_thread = verifier._save_thread
+
+        del verifier
+        gc.collect()
+        save_thread.join(timeout=5)
+
+        assert verifier_ref() is None
+        assert not save_thread.is_alive()
+
+    def test_clear_speaker_removes_profile_file(self, tmp_path):
+        """Test that clearing a speaker removes its profile file even with pending saves."""
+        verifier = self._create_verifier(storage_dir=str(tmp_path))
+        verifier.enroll_speaker("alice", _speaker_embeddings(1)[0])
+
+        assert verifier.clear_speaker("alice")
+        verifier.flush()
+
+        assert not verifier.profile_exists_on_disk("alice")
+        assert verifier.get_enrolled_speakers() == []
+
+    def test_save_all_profiles(self, tmp_path):
+        """Test saving all profiles writes one file per speaker."""
+        verifier = self._create_verifier(storage_dir=str(tmp_path))
+        verifier.enroll_speaker("alice", _speaker_embeddings(1)[0])
+        verifier.enroll_speaker("bob", _speaker_embeddings(2)[0])
+
+        assert verifier.save_all_profiles() == 2
+
+    def test_speaker_embedding_tracks_enrollment_changes(self):
+        """Test the averaged speaker embedding stays consistent after adding and removing samples."""
+        verifier = self._create_verifier()
+        alice = _speaker_embeddings(1, count=4)
+        for embedding in alice:
+            verifier.enroll_speaker("alice", embedding)
+        assert verifier.remove_speaker_sample("alice", 1)
+
+        expected = _unit(np.mean([alice[0], alice[2], alice[3]], axis=0))
+        np.testing.assert_allclose(verifier.get_speaker_embedding("alice"), expected, atol=1e-5)
+
+    def test_quantized_identification_rescores_at_full_precision(self):
+        """Test int8 shortlisting returns the same decisions and scores as full precision scoring."""
+        exact = self._create_verifier()
+        quantized = self._create_verifier(quantize=True)
+        alice = _speaker_embeddings(1, count=4)
+        bob = _speaker_embeddings(2, count=4)
+        for verifier in (exact, quantized):
+            for embedding in alice[:3]:
+                verifier.enroll_speaker("alice", embedding)
+            for embedding in bob[:3]:
+                verifier.enroll_speaker("bob", embedding)
+
+        test_embeddings = np.stack([alice[3], bob[3], _speaker_embeddings(3)[0]])
+        for expected, result in zip(exact.identify_speakers(test_embeddings), quantized.identify_speakers(test_embeddings)):
+            assert (result[0], result[2]) == (expected[0], expected[2])
+            assert result[1] == pytest.approx(expected[1], abs=1e-5)
+        _, quantized_score, _, _ = quantized.verify_speaker(alice[3], "alice")
+        assert quantized_score == pytest.approx(exact.verify_speaker(alice[3], "alice")[1], abs=1e-6)
+
+    def test_quantized_runner_up_is_a_rescored_candidate(self):
+        """Test best and runner-up come from the rescored candidates only, never from int8 scores."""
+        verifier = self._create_verifier(quantize=True)
+        for speaker_id, seed in (("alice", 1), ("bob", 2), ("carol", 3)):
+            verifier.enroll_speaker(speaker_id, _speaker_embeddings(seed)[0])
+        test_units = np.stack([_unit(_speaker_embeddings(1)[1])])
+        # Int8 scores rank alice and bob first; carol's int8 score would beat bob's float32 score
+        quantized_scores = np.array([[0.9, 0.8, 0.79]])
+
+        rescored = verifier._rescore_candidates(test_units, ["alice", "bob", "carol"], quantized_scores)
+
+        assert np.isneginf(rescored[0, 2])
+        for column, speaker_id in enumerate(["alice", "bob"]):
+            assert rescored[0, column] == pytest.approx(verifier.verify_speaker(test_units[0], speaker_id)[1], abs=1e-5)
+
+    def test_speaker_embedding_is_read_only_unit_vector(self):
+        """Test the speaker embedding is unit-norm and protected against modification."""
+        verifier = self._create_verifier()
+        verifier.enroll_speaker("alice", 3.0 * _speaker_embeddings(1)[0])
+
+        embedding = verifier.get_speaker_embedding("alice")
+
+        assert np.linalg.norm(embedding) == pytest.approx(1.0, abs=1e-6)
+        with pytest.raises(ValueError):
+            embedding[0] = 0.0
+
+    @pytest.mark.parametrize("quantize", [False, True])
+    def test_identify_speakers_matches_identify_speaker(self, quantize):
+        """Test batch identification returns the same decisions as single identification and verification."""
+        verifier = self._create_verifier(quantize=quantize)
+        alice = _speaker_embeddings(1, count=5)
+        bob = _speaker_embeddings(2, count=5)
+        for embedding in alice[:3]:
+            verifier.enroll_speaker("alice", embedding)
+        for embedding in bob[:4]:
+            verifier.enroll_speaker("bob", embedding)
+        test_embeddings = np.stack([alice[3], bob[4], alice[4], _speaker_embeddings(3)[0]])
+
+        results = verifier.identify_speakers(test_embeddings)
+
+        assert len(results) == 4
+        for test_embedding, (speaker_id, similarity, confidence_level, _) in zip(test_embeddings, results):
+            expected = verifier.identify_speaker(test_embedding)
+            assert speaker_id == expected[0]
+            assert confidence_level == expected[2]
+            assert similarity == pytest.approx(expected[1], abs=1e-5)
+            if speaker_id is not None:
+                assert similarity == pytest.approx(verifier.verify_speaker(test_embedding, speaker_id)[1], abs=1e-5)
+        assert [result[0] for result in results[:3]] == ["alice", "bob", "alice"]
+
+    def test_segment_top_k_means_match_sorted_segments(self):
+        """Test per-speaker top-k means over uneven segments with tied scores match sorting each segment."""
+        verifier = self._create_verifier()
+        counts = np.array([1, 5, 2, 7, 3])
+        starts = np.cumsum(counts) - counts
+        # Rounded scores produce ties within segments
+        similarities = np.round(np.random.default_rng(0).standard_normal((4, counts.sum())), 1).astype(np.float32)
+
+        expected = [
+            [np.sort(row[start:start + count])[::-1][:verifier.top_k_mean].mean() for start, count in zip(starts, counts)]
+            for row in similarities
+        ]
+        np.testing.assert_allclose(verifier._segment_top_k_means(similarities, starts, counts), expected, atol=1e-6)
+
+    def test_verify_cache_is_invalidated_by_enrollment(self):
+        """Test repeated verification is cached and refreshed after the profile changes."""
+        verifier = self._create_verifier()
+        alice = _speaker_embeddings(1, count=2)
+        bob = _speaker_embeddings(2)[0]
+        verifier.enroll_speaker("alice", alice[0])
+
+        first = verifier.verify_speaker(bob, "alice")
+        assert verifier.verify_speaker(bob.copy(), "alice") == first
+
+        verifier.enroll_speaker("alice", bob)
+        is_match, similarity, _, _ = verifier.verify_speaker(bob, "alice")
+        assert is_match is True
+        assert similarity > first[1]
+
+    def test_verify_cache_follows_scoring_parameters(self):
+        """Test cached verifications are not reused after the threshold or top-k change."""
+        verifier = self._create_verifier()
+        alice = _speaker_embeddings(1, count=3)
+        for embedding in alice[:2]:
+            verifier.enroll_speaker("alice", embedding)
+
+        is_match, similarity, _, _ = verifier.verify_speaker(alice[2], "alice")
+        assert is_match is True
+
+        verifier.similarity_threshold = similarity + 0.01
+        assert verifier.verify_speaker(alice[2], "alice")[0] is False
+
+        verifier.top_k_mean = 1
+        assert verifier.verify_speaker(alice[2], "alice")[1] > similarity
+
+    def test_enroll_copies_embedding(self):
+        """Test enrolled embeddings are copied into the profile and not affected by later changes."""
+        verifier = self._create_verifier()
+        embedding = 2.0 * _speaker_embeddings(1)[0]
+
+        verifier.enroll_speaker("alice", embedding)
+        embedding[:] = 0.0
+
+        assert np.linalg.norm(verifier.get_speaker_embedding("alice")) == pytest.approx(1.0, abs=1e-6)
+
+    def test_profiles_are_loaded_on_first_access(self, tmp_path):
+        """Test stored profiles are indexed at startup and loaded when first needed."""
+        verifier = self._create_verifier(storage_dir=str(tmp_path))
+        alice = _speaker_embeddings(1, count=4)
+        for embedding in alice[:3]:
+            verifier.enroll_speaker("alice", embedding)
+        verifier.enroll_speaker("bob", _speaker_embeddings(2)[0])
+        verifier.flush()
+
+        reloaded = self._create_verifier(storage_dir=str(tmp_path))
+        assert reloaded.enrolled_speakers == {}
+
+        reloaded.enroll_speaker("alice", alice[3])
+        assert reloaded.get_speaker_sample_count("alice") == 4
+        assert list(reloaded.enrolled_speakers) == ["alice"]
+        assert sorted(reloaded.get_enrolled_speakers()) == ["alice", "bob"]
+
+    def test_sample_counts_track_profile_changes(self, tmp_path):
+        """Test total and per-speaker sample counts follow enrollment, removal and clearing."""
+        verifier = self._create_verifier(storage_dir=str(tmp_path))
+        for embedding in _speaker_embeddings(1):
+            verifier.enroll_speaker("alice", embedding)
+        for embedding in _speaker_embeddings(2, count=2):
+            verifier.enroll_speaker("bob", embedding)
+        verifier.remove_speaker_sample("alice", 0)
+        verifier.flush()
+
+        stats = verifier.get_storage_stats()
+        metadata = verifier.export_profile_metadata()
+
+        assert verifier.get_total_samples() == 4
+        assert stats["total_samples"] == 4 and stats["disk_profiles"] == 2
+        assert metadata["profiles"]["alice"]["sample_count"] == 2
+        assert metadata["profiles"]["bob"]["file_exists"] is True
+
+        verifier.clear_speaker("bob")
+        assert verifier.get_total_samples() == 2
+
+    def test_enrolled_embeddings_are_float32_contiguous(self):
+        """Test embeddings of other dtypes or layouts are stored as contiguous float32."""
+        verifier = self._create_verifier()
+        strided = np.repeat(_speaker_embeddings(1)[0].astype(np.float64), 2)[::2]
+
+        verifier.enroll_speaker("alice", strided)
+        stored = verifier.enrolled_speakers["alice"].embeddings[0]
+
+        assert stored.dtype == np.float32
+        assert stored.flags.c_contiguous
+        assert verifier.verify_speaker(strided, "alice")[0] is True
+
+    def test_zero_test_embedding_is_not_matched(self):
+        """Test a zero test embedding is rejected instead of producing NaN scores."""
+        verifier = self._create_verifier()
+        verifier.enroll_speaker("alice", _speaker_embeddings(1)[0])
+        zero = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+
+        assert verifier.verify_speaker(zero, "alice") == (False, 0.0, "unknown", 0.0)
+        assert verifier.identify_speaker(zero) == (None, 0.0, "unknown", 0.0)
+        assert verifier.identify_speakers(np.stack([zero]))[0] == (None, 0.0, "unknown", 0.0)
+
+    @pytest.mark.parametrize("speaker_count", [1, 2, 5])
+    def test_batch_decisions_match_single_decisions(self, speaker_count):
+        """Test vectorized identity decisions agree with the per-row decision logic."""
+        verifier = self._create_verifier()
+        speaker_ids = [f"speaker{i}" for i in range(speaker_count)]
+        rng = np.random.default_rng(speaker_count)
+        scores = np.round(rng.uniform(-0.2, 0.9, size=(200, speaker_count)), 2)
+        valid = rng.uniform(size=200) > 0.1
+
+        results = verifier._decide_identities(speaker_ids, scores, valid)
+
+        for row, is_valid, result in zip(scores, valid, results):
+            expected = verifier._decide_identity(list(zip(speaker_ids, row.tolist()))) if is_valid else (None, 0.0, "unknown", 0.0)
+            assert result == expected
+
+    @pytest.mark.parametrize("quantize", [False, True])
+    def test_verify_speakers_matches_verify_speaker(self, quantize):
+        """Test batch verification returns the same results as verifying one embedding at a time."""
+        verifier = self._create_verifier(quantize=quantize)
+        alice = _speaker_embeddings(1, count=5)
+        for embedding in alice[:4]:
+            verifier.enroll_speaker("alice", embedding)
+        test_embeddings = np.stack([alice[4], _speaker_embeddings(2)[0], np.zeros(EMBEDDING_DIM, dtype=np.float32)])
+
+        results = verifier.verify_speakers(test_embeddings, "alice")
+
+        assert [result[0] for result in results] == [True, False, False]
+        for test_embedding, (is_match, similarity, confidence_level, _) in zip(test_embeddings, results):
+            expected = verifier.verify_speaker(test_embedding, "alice")
+            assert (is_match, confidence_level) == (expected[0], expected[2])
+            assert similarity == pytest.approx(expected[1], abs=1e-5)
+        assert verifier.verify_speakers(test_embeddings, "nobody") == [(False, 0.0, "unknown", 0.0)] * 3
+
+
+@pytest.mark.parametrize("score, expected", [(-0.5, "low"), (0.39, "low"), (0.4, "medium"), (0.59, "medium"), (0.6, "high"), (1.0, "high")])
+def test_confidence_level(score, expected):
+    """Test confidence levels switch at the documented thresholds, one by one and vectorized."""
+    assert confidence_level(score) == expected
+    assert confidence_levels(np.array([score]))[0] == expected
@@ -0,0 +1,82 @@
+"""Tests for the VoiceIdManager class."""
+
+import numpy as np
+import pytest
+from unittest.mock import Mock
+from yova_core.voice_id.voice_id_manager import VoiceIdManager
+
+
+def _embedding_for(audio):
+    """Helper mapping an audio clip to a deterministic fake embedding."""
+    rng = np.random.default_rng(int(abs(audio[0] * 32767)))
+    embedding = rng.standard_normal(192).astype(np.float32)
+    return embedding / np.linalg.norm(embedding)
+
+
+class TestVoiceIdManager:
+    """Test cases for the VoiceIdManager class."""
+
+    def _create_manager(self, tmp_path, **kwargs):
+        """Helper method to create a VoiceIdManager with a fake ECAPA model."""
+        model = Mock()
+        model.extract_embedding.side_effect = lambda audio, sr: _embedding_for(audio)
+        model.extract_embeddings_batch.side_effect = lambda audios, sr: [_embedding_for(audio) for audio in audios]
+        return VoiceIdManager(Mock(), users_path=str(tmp_path), model=model, **kwargs)
+
+    def test_identify_speakers_matches_identify_speaker(self, tmp_path):
+        """Test batch identification returns the same users as identifying one recording at a time."""
+        manager = self._create_manager(tmp_path)
+        alice, bob, stranger = (np.full(1600, value, dtype=np.int16) for value in (1, 2, 3))
+        manager.enroll_speaker("alice", alice)
+        manager.enroll_speaker("bob", bob)
+
+        results = manager.identify_speakers([alice, bob, stranger])
+
+        assert [result["user_id"] for result in results] == ["alice", "bob", None]
+        for audio, result in zip([alice, bob, stranger], results):
+            single = manager.identify_speaker(audio)
+            assert result["user_id"] == single["user_id"]
+            assert abs(result["similarity"] - single["similarity"]) < 1e-5
+            assert result["processing_time"] >= 0.0
+        assert manager.identify_speakers([]) == []
+
+    def test_enroll_speakers_matches_enroll_speaker(self, tmp_path):
+        """Test batch enrollment stores the same samples as enrolling one recording at a time."""
+        batch_manager = self._create_manager(tmp_path / "batch")
+        single_manager = self._create_manager(tmp_path / "single")
+        audios = [np.full(1600, value, dtype=np.int16) for value in (1, 2, 4)]
+        speaker_ids = ["alice", "bob", "alice"]
+
+        batch_manager.enroll_speakers(speaker_ids, audios)
+        for speaker_id, audio in zip(speaker_ids, audios):
+            single_manager.enroll_speaker(speaker_id, audio)
+
+        batch_manager.ecapa_model.extract_embeddings_batch.assert_called_once()
+        for speaker_id in ("alice", "bob"):
+            np.testing.assert_allclose(batch_manager.speaker_verifier.get_speaker_embedding(speaker_id),
+                                       single_manager.speaker_verifier.get_speaker_embedding(speaker_id), atol=1e-6)
+        with pytest.raises(ValueError):
+            batch_manager.enroll_speakers(["alice"], audios)
+
+    def test_quantize_is_passed_to_verifier(self, tmp_path):
+        """Test the quantize option reaches the speaker verifier and still identifies enrolled users."""
+        manager = self._create_manager(tmp_path, quantize=True)
+        alice = np.full(1600, 1, dtype=np.int16)
+        manager.enroll_speaker("alice", alice)
+
+        assert manager.speaker_verifier.quantize is True
+        result = manager.identify_speaker(alice)
+        assert result["user_id"] == "alice"
+        assert abs(result["similarity"] - 1.0) < 0.01
+
+    def test_float32_audio_is_passed_through(self, tmp_path):
+        """Test float32 audio reaches the model unchanged while PCM16 audio is scaled to [-1, 1]."""
+        manager = self._create_manager(tmp_path)
+        float32_audio = np.full(1600, 0.25, dtype=np.float32)
+
+        manager.enroll_speaker("alice", float32_audio)
+        manager.enroll_speaker("bob", np.full(1600, 16384, dtype=np.int16))
+
+        first, second = (call.args[0] for call in manager.ecapa_model.extract_embedding.call_args_list)
+        assert first is float32_audio
+        assert second.dtype == np.float32 and abs(second[0] - 16384 / 32767.0) < 1e-7
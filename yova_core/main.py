@@ -90,6 +90,7 @@ async def main():
             voice_id_manager=VoiceIdManager(
                 logger,
                 similarity_threshold=get_config("voice_id.threshold"),
+                quantize=get_config("voice_id.quantize"),
             ) if get_config("voice_id.enabled") else None,
             preprocess_pipeline=YovaPipeline(
                 logger, 
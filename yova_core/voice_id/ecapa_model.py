@@ -8,9 +8,23 @@ using the ECAPA-TDNN model from SpeechBrain.
 
 import numpy as np
 import torch
+from math import gcd
+from scipy.signal import resample_poly
+from typing import List, Tuple, Union
 from yova_shared import get_clean_logger
 import time
 
+# SpeechBrain model used when no custom model path is given
+DEFAULT_MODEL_SOURCE = "speechbrain/spkrec-ecapa-voxceleb"
+
+
+def resample_polyphase(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """Resample float32 audio with an anti-aliased polyphase FIR filter"""
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio
+    divisor = gcd(orig_sr, target_sr)
+    return resample_poly(audio, target_sr // divisor, orig_sr // divisor).astype(np.float32, copy=False)
+
 
 class ECAPAModel:
     """ECAPA-TDNN model for speaker recognition"""
@@ -27,7 +41,7 @@ class ECAPAModel:
             use_webrtcvad: Try WebRTC VAD if available, else energy-based fallback (default False for speed)
             vad_aggressiveness: WebRTC VAD aggressiveness (0-3)
             min_seconds_to_vad: Skip VAD entirely for shorter clips (just embed)
-            prefer_fast_resample: Use fast linear resampling instead of torchaudio sinc (speed)
+            prefer_fast_resample: Use SciPy polyphase resampling instead of torchaudio sinc (speed)
             quantize_linear: Apply dynamic int8 quantization to Linear layers on CPU
         """
         self.model = None
@@ -47,6 +61,7 @@ class ECAPAModel:
         self.prefer_fast_resample = bool(prefer_fast_resample)
         self._resamplers = {}
         self.quantize_linear = bool(quantize_linear)
+        self.model_source = model_path or DEFAULT_MODEL_SOURCE
         # Detect if webrtcvad is available at runtime
         self._webrtcvad_available = False
         if self.use_webrtcvad:
@@ -66,7 +81,7 @@ class ECAPAModel:
                 self.model = EncoderClassifier.from_hparams(model_path)
             else:
                 self.model = EncoderClassifier.from_hparams(
-                    "speechbrain/spkrec-ecapa-voxceleb"
+                    DEFAULT_MODEL_SOURCE
                 )
             
             self.model = self.model.to(self.device)
@@ -92,12 +107,19 @@ class ECAPAModel:
             self.logger.error(f"Failed to load ECAPA model: {e}")
             raise
     
-    def extract_embedding(self, audio: np.ndarray, sr: int) -> np.ndarray:
+    def embedding_config(self) -> tuple:
+        """Settings that change the embeddings produced for a given input, e.g. for cache keys"""
+        return (
+            self.model_source, 16000, self.enable_vad, self.max_seconds, self._webrtcvad_available,
+            self.vad_aggressiveness, self.min_seconds_to_vad, self.prefer_fast_resample, self.quantize_linear,
+        )
+    
+    def extract_embedding(self, audio: Union[np.ndarray, torch.Tensor], sr: int) -> np.ndarray:
         """
         Extract speaker embedding from audio
         
         Args:
-            audio: Audio signal (mono, float32, [-1, 1])
+            audio: Audio signal (mono, float32, [-1, 1]) as a NumPy array or torch tensor
             sr: Sample rate
             
         Returns:
@@ -107,58 +129,121 @@ class ECAPAModel:
             return np.array([])
         
         try:
-            # Ensure audio is the right format
-            if sr != 16000:
-                audio = self._resample_audio(audio, sr, 16000)
+            t0 = time.perf_counter()
+            if isinstance(audio, torch.Tensor) and sr == 16000 and not self._vad_applies(audio.numel(), sr):
+                # Nothing to preprocess, so the tensor goes to the model without a NumPy round trip
+                audio_tensor = audio.detach().reshape(1, -1).float().to(self.device, non_blocking=True)
+            else:
+                if isinstance(audio, torch.Tensor):
+                    # Resampling and VAD work on NumPy arrays
+                    audio = audio.detach().reshape(-1).float().cpu().numpy()
+                audio = self._prepare_audio(audio, sr)
                 sr = 16000
-            
-            # Optional VAD + clipping to reduce compute
-            if self.enable_vad and self.max_seconds and self.max_seconds > 0 and (len(audio) / sr) >= self.min_seconds_to_vad:
-                original_audio = audio
-                original_len = len(original_audio)
-                audio = self._apply_vad_and_clip(original_audio, sr, self.max_seconds)
-                if len(audio) == 0 and original_len > 0:
-                    # Fallback to best-energy clip from original audio
-                    audio = self._clip_best_window(original_audio, sr, self.max_seconds)
-                self.logger.debug(f"ECAPA VAD/clipping: {original_len/sr:.2f}s -> {len(audio)/sr:.2f}s")
-            # Log length before embedding
-            self.logger.debug(f"ECAPA embedding input: {len(audio)} samples, {sr} Hz, {len(audio)/sr:.2f}s")
 
-            # Convert to torch tensor
-            t0 = time.perf_counter()
-            audio_tensor = torch.from_numpy(audio).float().unsqueeze(0)
-            audio_tensor = audio_tensor.to(self.device)
+                # Convert to torch tensor
+                t0 = time.perf_counter()
+                audio_tensor = self._to_device(np.ascontiguousarray(audio, dtype=np.float32)[np.newaxis, :])
             
             # Extract embedding
             with torch.inference_mode():
                 t1 = time.perf_counter()
                 embedding = self.model.encode_batch(audio_tensor)
                 t2 = time.perf_counter()
-                embedding = embedding.squeeze().cpu().numpy()
+                # L2 normalization on the model device, so only the unit vector is copied to the host
+                embedding = torch.nn.functional.normalize(embedding.reshape(1, -1).float(), dim=-1, eps=1e-8)
+                embedding = embedding[0].cpu().numpy()
             t3 = time.perf_counter()
             self.logger.debug(f"ECAPA stages: to_tensor={(t1-t0)*1000:.1f}ms, encode={(t2-t1)*1000:.1f}ms, to_numpy={(t3-t2)*1000:.1f}ms")
             
-            # L2 normalization
-            embedding = embedding / (np.linalg.norm(embedding) + 1e-8)
-            
             return embedding
             
         except Exception as e:
             self.logger.error(f"Error extracting embedding: {e}")
             return np.array([])
     
+    def extract_embeddings_batch(self, audios: List[np.ndarray], sr: int, batch_size: int = 16) -> List[np.ndarray]:
+        """
+        Extract speaker embeddings from several clips with batched forward passes
+        
+        Clips are grouped by length and zero-padded; relative lengths are passed to the
+        model so padding is excluded from feature normalization and statistics pooling.
+        
+        Args:
+            audios: Audio signals (mono, float32, [-1, 1])
+            sr: Sample rate shared by all clips
+            batch_size: Maximum number of clips per forward pass
+            
+        Returns:
+            Speaker embedding vectors in input order (empty arrays on failure)
+        """
+        if self.model is None or not audios:
+            return [np.array([]) for _ in audios]
+        
+        try:
+            prepared = [self._prepare_audio(audio, sr) for audio in audios]
+            embeddings: List[np.ndarray] = [np.array([])] * len(prepared)
+            # Sorting by length keeps clips of similar duration together, minimizing padding
+            order = sorted(range(len(prepared)), key=lambda index: len(prepared[index]))
+            t0 = time.perf_counter()
+            for batch_start in range(0, len(order), max(1, batch_size)):
+                indices = order[batch_start:batch_start + max(1, batch_size)]
+                lengths = np.array([len(prepared[index]) for index in indices])
+                batch = np.zeros((len(indices), max(1, int(lengths.max()))), dtype=np.float32)
+                for row, index in enumerate(indices):
+                    batch[row, :lengths[row]] = prepared[index]
+                wav_lens = self._to_device((lengths / batch.shape[1]).astype(np.float32))
+                with torch.inference_mode():
+                    batch_embeddings = self.model.encode_batch(self._to_device(batch), wav_lens)
+                    # L2 normalization on the model device before the single host copy
+                    batch_embeddings = torch.nn.functional.normalize(batch_embeddings.reshape(len(indices), -1).float(), dim=-1, eps=1e-8)
+                    batch_embeddings = batch_embeddings.cpu().numpy()
+                for row, index in enumerate(indices):
+                    embeddings[index] = batch_embeddings[row]
+            self.logger.debug(f"ECAPA batch: {len(prepared)} clips, encode={(time.perf_counter()-t0)*1000:.1f}ms")
+            return embeddings
+            
+        except Exception as e:
+            self.logger.error(f"Error extracting embeddings: {e}")
+            return [np.array([]) for _ in audios]
+    
+    def _to_device(self, array: np.ndarray) -> torch.Tensor:
+        """Move a float32 array to the model device; CUDA copies go through pinned memory without blocking the host"""
+        tensor = torch.from_numpy(array)
+        if self.device.type == "cuda":
+            return tensor.pin_memory().to(self.device, non_blocking=True)
+        return tensor.to(self.device)
+    
+    def _vad_applies(self, num_samples: int, sr: int) -> bool:
+        """Whether VAD + clipping runs for a clip of num_samples at sample rate sr"""
+        return bool(self.enable_vad and self.max_seconds and self.max_seconds > 0 and (num_samples / sr) >= self.min_seconds_to_vad)
+    
+    def _prepare_audio(self, audio: np.ndarray, sr: int) -> np.ndarray:
+        """Resample to 16 kHz and apply the optional VAD + clipping before embedding"""
+        # Ensure audio is the right format
+        if sr != 16000:
+            audio = self._resample_audio(audio, sr, 16000)
+            sr = 16000
+        
+        # Optional VAD + clipping to reduce compute
+        if self._vad_applies(len(audio), sr):
+            original_audio = audio
+            original_len = len(original_audio)
+            audio = self._apply_vad_and_clip(original_audio, sr, self.max_seconds)
+            if len(audio) == 0 and original_len > 0:
+                # Fallback to best-energy clip from original audio
+                audio = self._clip_best_window(original_audio, sr, self.max_seconds)
+            self.logger.debug(f"ECAPA VAD/clipping: {original_len/sr:.2f}s -> {len(audio)/sr:.2f}s")
+        # Log length before embedding
+        self.logger.debug(f"ECAPA embedding input: {len(audio)} samples, {sr} Hz, {len(audio)/sr:.2f}s")
+        return audio
+    
     def _resample_audio(self, audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
-        """Resample audio, preferring fast linear interpolation. Falls back to torchaudio if requested."""
+        """Resample audio, preferring fast polyphase filtering. Falls back to torchaudio if requested."""
         if orig_sr == target_sr:
             return audio
         if self.prefer_fast_resample:
-            ratio = target_sr / orig_sr
-            new_length = int(len(audio) * ratio)
-            if new_length <= 0:
-                return audio
-            indices = np.linspace(0, len(audio) - 1, new_length, dtype=np.float32)
-            out = np.interp(indices, np.arange(len(audio), dtype=np.float32), audio.astype(np.float32))
-            self.logger.debug(f"ECAPA resample (linear fast): {orig_sr} -> {target_sr}, samples {len(audio)} -> {len(out)}")
+            out = resample_polyphase(audio, orig_sr, target_sr)
+            self.logger.debug(f"ECAPA resample (polyphase fast): {orig_sr} -> {target_sr}, samples {len(audio)} -> {len(out)}")
             return out
         try:
             import torchaudio
@@ -172,14 +257,9 @@ class ECAPAModel:
             self.logger.debug(f"ECAPA resample (torchaudio cached): {orig_sr} -> {target_sr}, samples {len(audio)} -> {len(out)}")
             return out
         except Exception:
-            # Fallback to linear
-            ratio = target_sr / orig_sr
-            new_length = int(len(audio) * ratio)
-            if new_length <= 0:
-                return audio
-            indices = np.linspace(0, len(audio) - 1, new_length, dtype=np.float32)
-            out = np.interp(indices, np.arange(len(audio), dtype=np.float32), audio.astype(np.float32))
-            self.logger.debug(f"ECAPA resample (linear fallback): {orig_sr} -> {target_sr}, samples {len(audio)} -> {len(out)}")
+            # Fallback to polyphase
+            out = resample_polyphase(audio, orig_sr, target_sr)
+            self.logger.debug(f"ECAPA resample (polyphase fallback): {orig_sr} -> {target_sr}, samples {len(audio)} -> {len(out)}")
             return out
     
     def _apply_vad_and_clip(self, audio: np.ndarray, sr: int, max_seconds: float) -> np.ndarray:
@@ -217,7 +297,7 @@ class ECAPAModel:
         num_frames = len(pcm16) // frame_len
         if num_frames == 0:
             return audio
-        voiced_flags = []
+        voiced_flags = np.empty(num_frames, dtype=np.int8)
         for i in range(num_frames):
             start = i * frame_len
             end = start + frame_len
@@ -226,19 +306,9 @@ class ECAPAModel:
                 is_voiced = vad.is_speech(frame_bytes, sr)
             except Exception:
                 is_voiced = True
-            voiced_flags.append(is_voiced)
+            voiced_flags[i] = is_voiced
         # Find longest contiguous voiced region
-        best_start = 0
-        best_end = 0
-        cur_start = None
-        for i, flag in enumerate(voiced_flags):
-            if flag and cur_start is None:
-                cur_start = i
-            if (not flag or i == len(voiced_flags) - 1) and cur_start is not None:
-                cur_end = i if not flag else i + 1
-                if (cur_end - cur_start) > (best_end - best_start):
-                    best_start, best_end = cur_start, cur_end
-                cur_start = None
+        best_start, best_end = self._longest_voiced_run(voiced_flags)
         if best_end <= best_start:
             # No voiced region found
             return self._vad_energy_best_window(audio, sr, target_len)
@@ -251,6 +321,18 @@ class ECAPAModel:
         start = (len(segment) - target_len) // 2
         return segment[start:start + target_len]
     
+    def _longest_voiced_run(self, voiced_flags: np.ndarray) -> Tuple[int, int]:
+        """Return (start, end) frame indices of the first longest run of voiced flags, or (0, 0) if none."""
+        # Rising/falling edges of the zero-padded flags mark where runs start and end
+        edges = np.diff(np.concatenate(([0], voiced_flags.astype(np.int8), [0])))
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+        if len(run_starts) == 0:
+            return 0, 0
+        # argmax picks the first of equally long runs
+        longest = int(np.argmax(run_ends - run_starts))
+        return int(run_starts[longest]), int(run_ends[longest])
+    
     def _vad_energy_best_window(self, audio: np.ndarray, sr: int, target_len: int) -> np.ndarray:
         """Energy-based VAD: choose highest-energy window of length target_len using O(n) cumulative sum."""
         if len(audio) <= target_len:
@@ -282,10 +364,22 @@ class ECAPAModel:
         start = int(np.argmax(window_sums))
         return start
     
+    def _moving_energy(self, audio: np.ndarray, win: int) -> np.ndarray:
+        """Centered moving sum of squared samples, as np.convolve(audio ** 2, ones(win), mode='same') in O(n)."""
+        n = len(audio)
+        # Prefix sum in float64 so long recordings do not accumulate rounding error
+        cumsum = np.zeros(n + 1, dtype=np.float64)
+        np.cumsum(np.square(audio, dtype=np.float64), out=cumsum[1:])
+        # Sample i sums audio[i - win // 2 : i + (win - 1) // 2 + 1], clipped to the signal
+        centers = np.arange(n)
+        lo = np.maximum(centers - win // 2, 0)
+        hi = np.minimum(centers + (win - 1) // 2 + 1, n)
+        return (cumsum[hi] - cumsum[lo]).astype(np.float32)
+
     def _trim_silence_energy(self, audio: np.ndarray, sr: int, threshold_ratio: float = 0.5) -> np.ndarray:
         """Trim leading/trailing low-energy regions using an energy threshold."""
         win = max(1, int(0.03 * sr))
-        energy = np.convolve(audio.astype(np.float32) ** 2, np.ones(win, dtype=np.float32), mode='same')
+        energy = self._moving_energy(audio, win)
         threshold = threshold_ratio * np.mean(energy) if len(energy) > 0 else 0
         if threshold <= 0:
             return audio
@@ -7,16 +7,54 @@ for speaker profiles, including saving, loading, backup, and cleanup operations.
 """
 
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 import logging
 import os
 import json
+import hashlib
+import functools
+import gzip
 import pickle
 import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Profiles are written as gzip-compressed pickles; plain pickles from older versions are still read
+PROFILE_SUFFIX = ".pkl.gz"
+LEGACY_PROFILE_SUFFIX = ".pkl"
+PROFILE_SUFFIXES = (PROFILE_SUFFIX, LEGACY_PROFILE_SUFFIX)
+
+# Concurrent file copies when backing up profiles
+BACKUP_MAX_WORKERS = 8
+
+
+@functools.lru_cache(maxsize=4096)
+def _sanitize_speaker_id(speaker_id: str) -> str:
+    """Map a speaker ID to a safe file name stem (pure function, safe to memoize)"""
+    safe_id = "".join(c for c in speaker_id if c.isalnum() or c in ('-', '_')).rstrip()
+    if not safe_id:
+        # Built-in hash() is randomized per process, use a stable digest instead
+        safe_id = f"speaker_{hashlib.blake2b(speaker_id.encode('utf-8'), digest_size=6).hexdigest()}"
+    return safe_id
+
+
+def _embedding_matrix(embeddings: List[np.ndarray]) -> np.ndarray:
+    """Stack embeddings into a contiguous (samples, dimension) float32 matrix"""
+    if not len(embeddings):
+        return np.empty((0, 0), dtype=np.float32)
+    return np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1))
+
+
+def _profile_stem(file_name: str) -> Optional[str]:
+    """Get the sanitized speaker ID from a profile file name, or None if not a profile file"""
+    for suffix in PROFILE_SUFFIXES:
+        if file_name.endswith(suffix):
+            return file_name[:-len(suffix)]
+    return None
+
 
 class ProfileStorage:
     """Handles file-based storage operations for speaker profiles"""
@@ -50,11 +88,76 @@ class ProfileStorage:
         if not self.storage_enabled:
             raise RuntimeError("Storage is disabled")
         
-        # Sanitize speaker_id to create safe filename
-        safe_id = "".join(c for c in speaker_id if c.isalnum() or c in ('-', '_')).rstrip()
-        if not safe_id:
-            safe_id = f"speaker_{hash(speaker_id) % 10000}"
-        return self.storage_dir / f"{safe_id}.pkl"
+        return self.storage_dir / f"{_sanitize_speaker_id(speaker_id)}{PROFILE_SUFFIX}"
+    
+    def _get_legacy_profile_path(self, speaker_id: str) -> Path:
+        """Get the uncompressed profile file path used by older versions"""
+        if not self.storage_enabled:
+            raise RuntimeError("Storage is disabled")
+        
+        return self.storage_dir / f"{_sanitize_speaker_id(speaker_id)}{LEGACY_PROFILE_SUFFIX}"
+    
+    def _find_profile_path(self, speaker_id: str) -> Optional[Path]:
+        """Get the path of an existing profile file, preferring the compressed format"""
+        for profile_path in (self._get_profile_path(speaker_id), self._get_legacy_profile_path(speaker_id)):
+            if profile_path.exists():
+                return profile_path
+        return None
+    
+    def get_profile_key(self, speaker_id: str) -> str:
+        """
+        Get the key identifying a speaker's profile file
+        
+        Args:
+            speaker_id: ID of the speaker
+            
+        Returns:
+            Sanitized speaker ID used as the profile file name stem
+        """
+        return _sanitize_speaker_id(speaker_id)
+    
+    def index_profiles(self) -> Dict[str, Path]:
+        """
+        Index profile files on disk without loading them
+        
+        Returns:
+            Dictionary mapping profile key (see get_profile_key) to profile file path
+        """
+        if not self.storage_enabled:
+            return {}
+        
+        return {_profile_stem(entry.name): Path(entry.path) for entry in self._scan_profiles()}
+    
+    def _scan_profile_files(self) -> List[os.DirEntry]:
+        """
+        List profile files with a single directory read
+        
+        DirEntry objects carry the file type from the directory read itself and cache
+        their stat result, avoiding the extra Path object and stat calls of glob().
+        
+        Returns:
+            List of directory entries for profile files
+        """
+        with os.scandir(self.storage_dir) as entries:
+            return [entry for entry in entries if _profile_stem(entry.name) is not None and entry.is_file()]
+    
+    def _scan_profiles(self) -> List[os.DirEntry]:
+        """
+        List one profile file per speaker, preferring compressed over legacy files
+        
+        Returns:
+            List of directory entries for profile files
+        """
+        profiles: Dict[str, os.DirEntry] = {}
+        for entry in self._scan_profile_files():
+            stem = _profile_stem(entry.name)
+            if stem not in profiles or entry.name.endswith(PROFILE_SUFFIX):
+                profiles[stem] = entry
+        return list(profiles.values())
+    
+    def _enrolled_stems(self, enrolled_speakers: Dict) -> Set[str]:
+        """Get the file name stems that belong to enrolled speakers"""
+        return {_sanitize_speaker_id(speaker_id) for speaker_id in enrolled_speakers}
     
     def save_profile(self, speaker_id: str, embeddings: List[np.ndarray]) -> bool:
         """
@@ -74,7 +177,9 @@ class ProfileStorage:
             profile_path = self._get_profile_path(speaker_id)
             profile_data = {
                 'speaker_id': speaker_id,
-                'embeddings': embeddings,
+                # One contiguous (samples, dimension) float32 matrix instead of a list of
+                # arrays: a single buffer to pickle and load
+                'embeddings': _embedding_matrix(embeddings),
                 'metadata': {
                     'sample_count': len(embeddings),
                     'created_at': None,  # Could be enhanced with timestamps
@@ -82,8 +187,26 @@ class ProfileStorage:
                 }
             }
             
-            with open(profile_path, 'wb') as f:
-                pickle.dump(profile_data, f)
+            # Write to a temporary file in the same directory and swap it in atomically, so a save
+            # interrupted at exit never leaves a truncated profile. The .tmp suffix keeps it out of scans
+            with tempfile.NamedTemporaryFile(dir=profile_path.parent, prefix=f".{profile_path.name}.", suffix=".tmp", delete=False) as tmp_file:
+                tmp_path = tmp_file.name
+                try:
+                    # Fast compression level: embeddings compress well and loading reads fewer bytes
+                    with gzip.GzipFile(fileobj=tmp_file, mode='wb', compresslevel=1) as f:
+                        pickle.dump(profile_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                except BaseException:
+                    # Also on KeyboardInterrupt/SystemExit, which are not caught below
+                    tmp_file.close()
+                    os.unlink(tmp_path)
+                    raise
+            os.replace(tmp_path, profile_path)
+            
+            # The compressed file supersedes any profile written by older versions; removed only
+            # once the new file is in place
+            legacy_path = self._get_legacy_profile_path(speaker_id)
+            if legacy_path.exists():
+                legacy_path.unlink()
             
             logger.debug(f"Saved profile for speaker {speaker_id} to {profile_path}")
             return True
@@ -106,14 +229,18 @@ class ProfileStorage:
             return None, None
         
         try:
-            with open(profile_path, 'rb') as f:
+            opener = gzip.open if str(profile_path).endswith(PROFILE_SUFFIX) else open
+            with opener(profile_path, 'rb') as f:
                 profile_data = pickle.load(f)
             
             speaker_id = profile_data['speaker_id']
             embeddings = profile_data['embeddings']
             
-            # Convert back to numpy arrays if needed
-            if embeddings and not isinstance(embeddings[0], np.ndarray):
+            if isinstance(embeddings, np.ndarray):
+                # Stored as one matrix; rows are views into it
+                embeddings = list(embeddings)
+            elif embeddings and not isinstance(embeddings[0], np.ndarray):
+                # Convert back to numpy arrays if needed
                 embeddings = [np.array(emb) for emb in embeddings]
             
             logger.debug(f"Loaded profile for speaker {speaker_id} from {profile_path}")
@@ -140,8 +267,8 @@ class ProfileStorage:
             self.storage_dir.mkdir(parents=True, exist_ok=True)
             return loaded_profiles
         
-        for profile_file in self.storage_dir.glob("*.pkl"):
-            speaker_id, embeddings = self.load_profile(profile_file)
+        for entry in self._scan_profiles():
+            speaker_id, embeddings = self.load_profile(Path(entry.path))
             if speaker_id and embeddings:
                 loaded_profiles[speaker_id] = embeddings
         
@@ -192,13 +319,11 @@ class ProfileStorage:
         backup_path.mkdir(parents=True, exist_ok=True)
         
         try:
-            # Copy profile files to backup directory
-            copied_count = 0
-            for profile_file in self.storage_dir.glob("*.pkl"):
-                if profile_file.name != "backup":  # Skip backup directory itself
-                    backup_file = backup_path / profile_file.name
-                    shutil.copy2(profile_file, backup_file)
-                    copied_count += 1
+            # Copy profile files to backup directory, overlapping per-file I/O latency
+            copy_jobs = [(entry.path, backup_path / entry.name) for entry in self._scan_profile_files()]
+            with ThreadPoolExecutor(max_workers=BACKUP_MAX_WORKERS) as executor:
+                list(executor.map(lambda job: shutil.copy2(*job), copy_jobs))
+            copied_count = len(copy_jobs)
             
             logger.info(f"Backed up {copied_count} profiles to {backup_path}")
             return True
@@ -222,16 +347,13 @@ class ProfileStorage:
             return 0
         
         removed_count = 0
+        enrolled_stems = self._enrolled_stems(enrolled_speakers)
         
-        for profile_file in self.storage_dir.glob("*.pkl"):
-            if profile_file.name == "backup":  # Skip backup directory
-                continue
-                
-            # Extract speaker_id from filename
-            speaker_id = profile_file.stem
+        for entry in self._scan_profile_files():
+            profile_file = Path(entry.path)
             
-            # Check if this speaker is still in memory
-            if speaker_id not in enrolled_speakers:
+            # Check if this file belongs to a speaker still in memory
+            if _profile_stem(entry.name) not in enrolled_stems:
                 try:
                     profile_file.unlink()
                     removed_count += 1
@@ -256,8 +378,7 @@ class ProfileStorage:
             return False
         
         try:
-            profile_path = self._get_profile_path(speaker_id)
-            return profile_path.exists()
+            return self._find_profile_path(speaker_id) is not None
         except RuntimeError:
             return False
     
@@ -275,8 +396,8 @@ class ProfileStorage:
             return None, None
         
         try:
-            profile_path = self._get_profile_path(speaker_id)
-            if profile_path.exists():
+            profile_path = self._find_profile_path(speaker_id)
+            if profile_path is not None:
                 return self.load_profile(profile_path)
         except RuntimeError:
             pass
@@ -296,9 +417,12 @@ class ProfileStorage:
             return False
         
         try:
-            profile_path = self._get_profile_path(speaker_id)
-            if profile_path.exists():
-                profile_path.unlink()
+            removed = False
+            for profile_path in (self._get_profile_path(speaker_id), self._get_legacy_profile_path(speaker_id)):
+                if profile_path.exists():
+                    profile_path.unlink()
+                    removed = True
+            if removed:
                 logger.debug(f"Removed profile file for speaker {speaker_id}")
                 return True
         except Exception as e:
@@ -306,12 +430,12 @@ class ProfileStorage:
         
         return False
     
-    def get_storage_stats(self, enrolled_speakers: Dict[str, List[np.ndarray]]) -> Dict:
+    def get_storage_stats(self, sample_counts: Dict[str, int]) -> Dict:
         """
         Get statistics about the storage system
         
         Args:
-            enrolled_speakers: Dictionary of currently enrolled speakers
+            sample_counts: Dictionary mapping currently enrolled speakers to their sample counts
             
         Returns:
             Dictionary containing storage statistics
@@ -319,69 +443,68 @@ class ProfileStorage:
         stats = {
             'storage_enabled': self.storage_enabled,
             'storage_directory': str(self.storage_dir) if self.storage_enabled else None,
-            'total_speakers': len(enrolled_speakers),
-            'total_samples': sum(len(samples) for samples in enrolled_speakers.values()),
+            'total_speakers': len(sample_counts),
+            'total_samples': sum(sample_counts.values()),
             'disk_profiles': 0,
             'total_disk_size': 0,
             'orphaned_files': 0
         }
         
         if self.storage_enabled and self.storage_dir.exists():
-            for profile_file in self.storage_dir.glob("*.pkl"):
-                if profile_file.name != "backup":
-                    stats['disk_profiles'] += 1
-                    stats['total_disk_size'] += profile_file.stat().st_size
-                    
-                    # Check if this file corresponds to a speaker in memory
-                    speaker_id = profile_file.stem
-                    if speaker_id not in enrolled_speakers:
-                        stats['orphaned_files'] += 1
+            enrolled_stems = self._enrolled_stems(sample_counts)
+            for entry in self._scan_profile_files():
+                stats['disk_profiles'] += 1
+                stats['total_disk_size'] += entry.stat().st_size
+                
+                # Check if this file corresponds to a speaker in memory
+                if _profile_stem(entry.name) not in enrolled_stems:
+                    stats['orphaned_files'] += 1
         
         return stats
     
-    def export_profile_metadata(self, enrolled_speakers: Dict[str, List[np.ndarray]], 
+    def export_profile_metadata(self, sample_counts: Dict[str, int], 
                                output_file: str = None) -> Dict:
         """
         Export metadata about all stored profiles
         
         Args:
-            enrolled_speakers: Dictionary of currently enrolled speakers
+            sample_counts: Dictionary mapping currently enrolled speakers to their sample counts
             output_file: Optional JSON file to save metadata to
             
         Returns:
             Dictionary containing profile metadata
         """
         metadata = {
-            'total_speakers': len(enrolled_speakers),
-            'total_samples': sum(len(samples) for samples in enrolled_speakers.values()),
+            'total_speakers': len(sample_counts),
+            'total_samples': sum(sample_counts.values()),
             'storage_enabled': self.storage_enabled,
             'storage_directory': str(self.storage_dir) if self.storage_enabled else None,
             'profiles': {}
         }
         
         if self.storage_enabled:
-            for speaker_id in enrolled_speakers:
+            for speaker_id, sample_count in sample_counts.items():
                 try:
-                    profile_path = self._get_profile_path(speaker_id)
+                    profile_path = self._find_profile_path(speaker_id)
                     metadata['profiles'][speaker_id] = {
-                        'sample_count': len(enrolled_speakers[speaker_id]),
-                        'profile_file': str(profile_path),
-                        'file_exists': profile_path.exists(),
-                        'file_size': profile_path.stat().st_size if profile_path.exists() else 0
+                        'sample_count': sample_count,
+                        'profile_file': str(profile_path or self._get_profile_path(speaker_id)),
+                        'file_exists': profile_path is not None,
+                        'file_size': profile_path.stat().st_size if profile_path is not None else 0
                     }
                 except RuntimeError:
                     # Storage disabled
                     metadata['profiles'][speaker_id] = {
-                        'sample_count': len(enrolled_speakers[speaker_id]),
+                        'sample_count': sample_count,
                         'profile_file': None,
                         'file_exists': False,
                         'file_size': 0
                     }
         else:
             # Storage disabled - just include basic info
-            for speaker_id in enrolled_speakers:
+            for speaker_id, sample_count in sample_counts.items():
                 metadata['profiles'][speaker_id] = {
-                    'sample_count': len(enrolled_speakers[speaker_id]),
+                    'sample_count': sample_count,
                     'profile_file': None,
                     'file_exists': False,
                     'file_size': 0
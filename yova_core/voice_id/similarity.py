@@ -0,0 +1,141 @@
+"""
+Similarity kernels for speaker embeddings
+
+Scores unit-norm test embeddings against stacked unit-norm enrollment
+samples. Uses SimSIMD or a Numba kernel when installed and falls back to
+NumPy/BLAS otherwise; all produce the same dot-product (cosine) similarities.
+"""
+
+import numpy as np
+from typing import Tuple
+from scipy.linalg.blas import sgemv
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+SIMSIMD_AVAILABLE = simsimd is not None
+
+# Largest int8 magnitude used when quantizing embeddings
+QUANTIZATION_SCALE = 127.0
+
+
+def _similarity_vector_loop(matrix, vector):
+    """Dot product of every matrix row with a vector in a single fused loop"""
+    similarities = np.empty(matrix.shape[0], dtype=np.float32)
+    for row in range(matrix.shape[0]):
+        dot = np.float32(0.0)
+        for i in range(vector.shape[0]):
+            dot += matrix[row, i] * vector[i]
+        similarities[row] = dot
+    return similarities
+
+
+def _load_numba_kernel():
+    """Wrap the fused loop with Numba, or return None if Numba is not installed"""
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True, fastmath=True)(_similarity_vector_loop)
+
+
+# Numba is only needed without SimSIMD, and importing it adds seconds to startup
+_similarity_vector_numba = None if SIMSIMD_AVAILABLE else _load_numba_kernel()
+NUMBA_AVAILABLE = _similarity_vector_numba is not None
+
+
+def warm_up():
+    """
+    Compile the Numba kernel ahead of the first query
+
+    Numba compiles on first call, which would otherwise land inside the first
+    verification. Both read-only enrollment matrices and writable ones are compiled.
+    """
+    if SIMSIMD_AVAILABLE or not NUMBA_AVAILABLE:
+        return
+    vector = np.zeros(1, dtype=np.float32)
+    matrix = np.zeros((1, 1), dtype=np.float32)
+    _similarity_vector_numba(matrix, vector)
+    matrix.flags.writeable = False
+    _similarity_vector_numba(matrix, vector)
+
+
+def similarity_vector(matrix: np.ndarray, test_unit: np.ndarray) -> np.ndarray:
+    """
+    Compute similarities of one unit test embedding against every row of a matrix
+
+    Args:
+        matrix: C-contiguous float32 matrix of unit enrollment samples, shape (samples, dimension)
+        test_unit: Contiguous float32 unit test embedding, shape (dimension,)
+
+    Returns:
+        Similarities, shape (samples,)
+    """
+    if SIMSIMD_AVAILABLE:
+        # A single query is dominated by call overhead, where SimSIMD's fused kernels win
+        return np.asarray(simsimd.cdist(test_unit[np.newaxis, :], matrix, metric="dot"))[0]
+    if NUMBA_AVAILABLE:
+        # Compiled loop avoids NumPy/BLAS dispatch overhead on small matrices
+        return _similarity_vector_numba(matrix, test_unit)
+    # The transposed (Fortran-ordered) view lets sgemv read the matrix without copying it
+    return sgemv(1.0, matrix.T, test_unit, trans=1)
+
+
+def similarity_matrix(test_units: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """
+    Compute similarities of a batch of unit test embeddings against every row of a matrix
+
+    Args:
+        test_units: C-contiguous float32 unit test embeddings, shape (batch_size, dimension)
+        matrix: C-contiguous float32 matrix of unit enrollment samples, shape (samples, dimension)
+
+    Returns:
+        Similarities, shape (batch_size, samples)
+    """
+    if test_units.shape[0] == 1:
+        return similarity_vector(matrix, test_units[0])[np.newaxis, :]
+    # Larger batches are a matrix product, where BLAS gemm is faster than pairwise kernels
+    return test_units @ matrix.T
+
+
+def quantize_int8(units: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize embeddings to int8 with a per-row scale
+
+    Each row is scaled so that its largest component maps to 127, which uses the
+    full int8 range instead of the [-1, 1] bound of a unit vector.
+
+    Args:
+        units: Float matrix of embeddings, shape (rows, dimension)
+
+    Returns:
+        Tuple of (int8 matrix, float32 per-row scales); row ~= quantized / scale
+    """
+    peaks = np.max(np.abs(units), axis=1)
+    scales = np.where(peaks > 0, QUANTIZATION_SCALE / np.where(peaks > 0, peaks, 1.0), 1.0).astype(np.float32)
+    quantized = np.round(units * scales[:, np.newaxis]).astype(np.int8)
+    return quantized, scales
+
+
+def quantized_similarity_matrix(test_quantized: np.ndarray, test_scales: np.ndarray,
+                                matrix_quantized: np.ndarray, matrix_scales: np.ndarray) -> np.ndarray:
+    """
+    Compute similarities between int8-quantized unit embeddings
+
+    Args:
+        test_quantized: int8 test embeddings, shape (batch_size, dimension)
+        test_scales: Per-row scales of the test embeddings, shape (batch_size,)
+        matrix_quantized: int8 enrollment samples, shape (samples, dimension)
+        matrix_scales: Per-row scales of the enrollment samples, shape (samples,)
+
+    Returns:
+        Similarities, shape (batch_size, samples)
+    """
+    if SIMSIMD_AVAILABLE and test_quantized.shape[0] == 1:
+        # SimSIMD accumulates int8 products without widening the matrix first
+        dots = np.asarray(simsimd.cdist(test_quantized, matrix_quantized, metric="dot"))
+    else:
+        dots = test_quantized.astype(np.int32) @ matrix_quantized.T.astype(np.int32)
+    return dots.astype(np.float32) / np.outer(test_scales, matrix_scales)
@@ -7,11 +7,17 @@ including embeddings storage, sample operations, and profile statistics.
 """
 
 import numpy as np
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import logging
+from .similarity import quantize_int8
 
 logger = logging.getLogger(__name__)
 
+# Number of sample rows allocated for a new profile; the buffer doubles when full
+INITIAL_SAMPLE_CAPACITY = 8
+# Squared norm below which the summed samples cancel out and have no direction
+MIN_CENTROID_SQUARED_NORM = 1e-10
+
 
 class SpeakerProfile:
     """Manages individual speaker profile data and operations"""
@@ -24,17 +30,42 @@ class SpeakerProfile:
             speaker_id: Unique identifier for the speaker
         """
         self.speaker_id = speaker_id
-        self.embeddings: List[np.ndarray] = []
+        # Embeddings are rows of one float32 buffer that grows by doubling;
+        # rows [0, _count) are in use
+        self._samples: Optional[np.ndarray] = None
+        self._count = 0
+        # Running (unnormalized) sum of embeddings and lazily computed centroid
+        self._embedding_sum: Optional[np.ndarray] = None
+        self._centroid: Optional[np.ndarray] = None
+        self._quantized_matrix: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._stats: Optional[Dict[str, Any]] = None
         self.metadata: Dict[str, Any] = {
             'created_at': None,  # Could be enhanced with timestamps
             'last_updated': None,
             'total_samples': 0
         }
     
+    @property
+    def embeddings(self) -> List[np.ndarray]:
+        """Read-only views of the stored embeddings, one per sample"""
+        matrix = self.get_embedding_matrix()
+        return [] if matrix is None else list(matrix)
+    
+    def _profile_changed(self):
+        """Drop derived data after the embeddings change"""
+        self._centroid = None
+        self._quantized_matrix = None
+        self._stats = None
+        self.metadata['total_samples'] = self._count
+        self.metadata['last_updated'] = None  # Could be enhanced with timestamps
+    
     def add_embedding(self, embedding: np.ndarray) -> bool:
         """
         Add a new embedding to the speaker's profile
         
+        Embeddings are stored L2-normalized; all profile embeddings are unit vectors.
+        The embedding is copied into the profile's sample buffer.
+        
         Args:
             embedding: Speaker's embedding vector
             
@@ -42,16 +73,87 @@ class SpeakerProfile:
             True if embedding added successfully
         """
         try:
-            # Make a copy to avoid external modifications
-            embedding_copy = embedding.copy()
-            self.embeddings.append(embedding_copy)
-            self.metadata['total_samples'] = len(self.embeddings)
-            self.metadata['last_updated'] = None  # Could be enhanced with timestamps
+            embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+            norm = np.sqrt(np.dot(embedding, embedding))
+            if not norm > 0:
+                logger.warning(f"Rejected zero-norm embedding for speaker {self.speaker_id}")
+                return False
+            if self._samples is None:
+                self._samples = np.empty((INITIAL_SAMPLE_CAPACITY, embedding.size), dtype=np.float32)
+            elif embedding.size != self._samples.shape[1]:
+                logger.error(f"Embedding dimension {embedding.size} does not match {self._samples.shape[1]} for speaker {self.speaker_id}")
+                return False
+            elif self._count == self._samples.shape[0]:
+                grown = np.empty((2 * self._samples.shape[0], self._samples.shape[1]), dtype=np.float32)
+                grown[:self._count] = self._samples[:self._count]
+                self._samples = grown
+            
+            # Rows past _count are not visible to any view, so they can be written in place
+            row = np.multiply(embedding, np.float32(1.0 / norm), out=self._samples[self._count])
+            self._count += 1
+            if self._embedding_sum is None:
+                self._embedding_sum = row.astype(np.float64)
+            else:
+                self._embedding_sum += row
+            self._profile_changed()
             return True
         except Exception as e:
             logger.error(f"Failed to add embedding for speaker {self.speaker_id}: {e}")
             return False
     
+    def add_embeddings(self, embeddings: List[np.ndarray]) -> int:
+        """
+        Add several embeddings at once
+        
+        Normalizes all embeddings in one pass and folds their sum into the running
+        centroid sum, instead of updating it once per embedding.
+        
+        Args:
+            embeddings: Speaker's embedding vectors, all of the same dimension
+            
+        Returns:
+            Number of embeddings added; zero-norm embeddings are skipped
+        """
+        try:
+            matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        except ValueError as e:
+            logger.error(f"Failed to add embeddings for speaker {self.speaker_id}: {e}")
+            return 0
+        if not matrix.size:
+            return 0
+        if self._samples is not None and matrix.shape[1] != self._samples.shape[1]:
+            logger.error(f"Embedding dimension {matrix.shape[1]} does not match {self._samples.shape[1]} for speaker {self.speaker_id}")
+            return 0
+        
+        norms = np.sqrt(np.einsum('ij,ij->i', matrix, matrix))
+        valid = norms > 0
+        if not valid.all():
+            logger.warning(f"Rejected {int((~valid).sum())} zero-norm embeddings for speaker {self.speaker_id}")
+        units = matrix[valid] / norms[valid, np.newaxis]
+        added = units.shape[0]
+        if not added:
+            return 0
+        
+        required = self._count + added
+        if self._samples is None or required > self._samples.shape[0]:
+            capacity = max(INITIAL_SAMPLE_CAPACITY, self._samples.shape[0] if self._samples is not None else 0)
+            while capacity < required:
+                capacity *= 2
+            grown = np.empty((capacity, units.shape[1]), dtype=np.float32)
+            if self._count:
+                grown[:self._count] = self._samples[:self._count]
+            self._samples = grown
+        self._samples[self._count:required] = units
+        self._count = required
+        
+        units_sum = units.sum(axis=0, dtype=np.float64)
+        if self._embedding_sum is None:
+            self._embedding_sum = units_sum
+        else:
+            self._embedding_sum += units_sum
+        self._profile_changed()
+        return added
+    
     def remove_embedding(self, index: int) -> bool:
         """
         Remove a specific embedding by index
@@ -62,10 +164,19 @@ class SpeakerProfile:
         Returns:
             True if embedding removed successfully, False otherwise
         """
-        if 0 <= index < len(self.embeddings):
-            self.embeddings.pop(index)
-            self.metadata['total_samples'] = len(self.embeddings)
-            self.metadata['last_updated'] = None  # Could be enhanced with timestamps
+        if 0 <= index < self._count:
+            removed = self._samples[index].copy()
+            # Compact into a fresh buffer so previously returned views stay unchanged
+            compacted = np.empty_like(self._samples)
+            compacted[:index] = self._samples[:index]
+            compacted[index:self._count - 1] = self._samples[index + 1:self._count]
+            self._samples = compacted
+            self._count -= 1
+            if self._count:
+                self._embedding_sum -= removed
+            else:
+                self._embedding_sum = None
+            self._profile_changed()
             logger.debug(f"Removed embedding {index} from speaker {self.speaker_id}")
             return True
         return False
@@ -77,10 +188,11 @@ class SpeakerProfile:
         Returns:
             Number of embeddings removed
         """
-        removed_count = len(self.embeddings)
-        self.embeddings.clear()
-        self.metadata['total_samples'] = 0
-        self.metadata['last_updated'] = None  # Could be enhanced with timestamps
+        removed_count = self._count
+        self._samples = None
+        self._count = 0
+        self._embedding_sum = None
+        self._profile_changed()
         logger.debug(f"Cleared all {removed_count} embeddings from speaker {self.speaker_id}")
         return removed_count
     
@@ -94,12 +206,12 @@ class SpeakerProfile:
         Returns:
             Embedding vector or None if not found
         """
-        if not self.embeddings:
+        if not self._count:
             return None
         
         if index is not None:
-            if 0 <= index < len(self.embeddings):
-                return self.embeddings[index].copy()
+            if 0 <= index < self._count:
+                return self._samples[index].copy()
             return None
         
         # Return averaged embedding
@@ -109,22 +221,36 @@ class SpeakerProfile:
         """
         Get the averaged embedding for the speaker
         
+        The returned array is a read-only view of cached data; copy it before modifying.
+        
         Returns:
-            Averaged embedding vector or None if no embeddings
+            Averaged unit-norm embedding vector, or None if no embeddings or the samples cancel out
         """
-        if not self.embeddings:
+        if not self._count:
             return None
         
-        # If only one embedding, return it directly
-        if len(self.embeddings) == 1:
-            return self.embeddings[0].copy()
+        # If only one embedding, it is already unit-norm
+        if self._count == 1:
+            embedding = self._samples[0].view()
+            embedding.flags.writeable = False
+            return embedding
         
-        # Average multiple embeddings
-        avg_embedding = np.mean(self.embeddings, axis=0)
-        # Renormalize
-        avg_embedding = avg_embedding / np.linalg.norm(avg_embedding)
+        # Normalized running sum equals the renormalized mean; recomputed only after changes
+        if self._centroid is None:
+            centroid_sum = self._embedding_sum
+            squared_norm = np.dot(centroid_sum, centroid_sum)
+            if squared_norm < MIN_CENTROID_SQUARED_NORM:
+                # Rebuild the sum to drop accumulated rounding before giving up
+                centroid_sum = self._samples[:self._count].sum(axis=0, dtype=np.float64)
+                self._embedding_sum = centroid_sum
+                squared_norm = np.dot(centroid_sum, centroid_sum)
+                if squared_norm < MIN_CENTROID_SQUARED_NORM:
+                    return None
+            centroid = (centroid_sum / np.sqrt(squared_norm)).astype(np.float32)
+            centroid.flags.writeable = False
+            self._centroid = centroid
         
-        return avg_embedding
+        return self._centroid
     
     def get_sample_count(self) -> int:
         """
@@ -133,7 +259,7 @@ class SpeakerProfile:
         Returns:
             Number of samples
         """
-        return len(self.embeddings)
+        return self._count
     
     def get_embeddings_list(self) -> List[np.ndarray]:
         """
@@ -144,14 +270,50 @@ class SpeakerProfile:
         """
         return [emb.copy() for emb in self.embeddings]
     
-    def get_embeddings_for_storage(self) -> List[np.ndarray]:
+    def get_embedding_matrix(self) -> Optional[np.ndarray]:
+        """
+        Get all embeddings as a C-contiguous float32 matrix
+        
+        Returns a read-only view of the sample buffer, so no copy is made.
+        
+        Returns:
+            Matrix of shape (sample_count, dimension) or None if no embeddings
+        """
+        if not self._count:
+            return None
+        matrix = self._samples[:self._count]
+        matrix.flags.writeable = False
+        return matrix
+    
+    def get_quantized_matrix(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get the (unit-norm) embeddings quantized to int8 with per-sample scales
+        
+        The matrix is cached until the profile changes and must not be modified by callers.
+        
+        Returns:
+            Tuple of (int8 matrix of shape (sample_count, dimension), per-sample scales)
+            or None if no embeddings
+        """
+        matrix = self.get_embedding_matrix()
+        if matrix is None:
+            return None
+        if self._quantized_matrix is None:
+            self._quantized_matrix = quantize_int8(matrix)
+        return self._quantized_matrix
+    
+    def get_embeddings_for_storage(self) -> np.ndarray:
         """
         Get embeddings in the format expected by storage layer
         
+        Rows already handed out are never modified (removal compacts into a new
+        buffer), so the read-only matrix view is a consistent snapshot without copying.
+        
         Returns:
-            List of embedding vectors (copies)
+            Matrix of embedding vectors, shape (sample_count, dimension)
         """
-        return self.get_embeddings_list()
+        matrix = self.get_embedding_matrix()
+        return matrix if matrix is not None else np.empty((0, 0), dtype=np.float32)
     
     def has_embeddings(self) -> bool:
         """
@@ -160,7 +322,7 @@ class SpeakerProfile:
         Returns:
             True if profile has embeddings, False otherwise
         """
-        return len(self.embeddings) > 0
+        return self._count > 0
     
     def is_empty(self) -> bool:
         """
@@ -169,7 +331,7 @@ class SpeakerProfile:
         Returns:
             True if profile has no embeddings, False otherwise
         """
-        return len(self.embeddings) == 0
+        return self._count == 0
     
     def get_profile_summary(self) -> Dict[str, Any]:
         """
@@ -180,7 +342,7 @@ class SpeakerProfile:
         """
         return {
             'speaker_id': self.speaker_id,
-            'sample_count': len(self.embeddings),
+            'sample_count': self._count,
             'has_embeddings': self.has_embeddings(),
             'metadata': self.metadata.copy()
         }
@@ -192,17 +354,15 @@ class SpeakerProfile:
         Returns:
             True if all embeddings are valid, False otherwise
         """
-        if not self.embeddings:
+        if not self._count:
             return True  # Empty profile is valid
         
         try:
-            for i, emb in enumerate(self.embeddings):
-                if not isinstance(emb, np.ndarray):
-                    logger.warning(f"Invalid embedding type at index {i} for speaker {self.speaker_id}")
-                    return False
-                if emb.size == 0:
-                    logger.warning(f"Empty embedding at index {i} for speaker {self.speaker_id}")
-                    return False
+            # Samples share one float32 buffer, so only their values can be invalid
+            invalid_rows = np.flatnonzero(~np.isfinite(self.get_embedding_matrix()).all(axis=1))
+            if invalid_rows.size:
+                logger.warning(f"Non-finite embedding at index {invalid_rows[0]} for speaker {self.speaker_id}")
+                return False
             return True
         except Exception as e:
             logger.error(f"Error validating embeddings for speaker {self.speaker_id}: {e}")
@@ -215,42 +375,49 @@ class SpeakerProfile:
         Returns:
             Embedding dimension or None if no embeddings
         """
-        if not self.embeddings:
+        if not self._count:
             return None
         
-        try:
-            return self.embeddings[0].size
-        except (AttributeError, IndexError):
-            return None
+        return self._samples.shape[1]
     
     def get_embedding_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the embeddings
         
+        Computed directly on the sample buffer and cached until the profile changes.
+        
         Returns:
-            Dictionary containing embedding statistics
+            Dictionary containing embedding statistics; 'variance' is the mean
+            per-dimension variance of the samples (lower means a more consistent speaker)
         """
-        if not self.embeddings:
+        if not self._count:
             return {
                 'count': 0,
                 'dimension': None,
                 'mean_norm': None,
-                'std_norm': None
+                'std_norm': None,
+                'variance': None
             }
         
-        try:
-            norms = [np.linalg.norm(emb) for emb in self.embeddings]
-            return {
-                'count': len(self.embeddings),
-                'dimension': self.embeddings[0].size,
-                'mean_norm': np.mean(norms),
-                'std_norm': np.std(norms)
-            }
-        except Exception as e:
-            logger.error(f"Error calculating embedding stats for speaker {self.speaker_id}: {e}")
-            return {
-                'count': len(self.embeddings),
-                'dimension': None,
-                'mean_norm': None,
-                'std_norm': None
-            }
+        if self._stats is None:
+            try:
+                matrix = self.get_embedding_matrix()
+                norms = np.sqrt(np.einsum('ij,ij->i', matrix, matrix))
+                self._stats = {
+                    'count': self._count,
+                    'dimension': matrix.shape[1],
+                    'mean_norm': float(np.mean(norms)),
+                    'std_norm': float(np.std(norms)),
+                    'variance': float(matrix.var(axis=0, dtype=np.float32).mean())
+                }
+            except Exception as e:
+                logger.error(f"Error calculating embedding stats for speaker {self.speaker_id}: {e}")
+                return {
+                    'count': self._count,
+                    'dimension': None,
+                    'mean_norm': None,
+                    'std_norm': None,
+                    'variance': None
+                }
+        
+        return self._stats.copy()
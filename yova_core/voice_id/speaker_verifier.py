@@ -6,18 +6,72 @@ This module provides the SpeakerVerifier class for speaker recognition and verif
 using cosine similarity between ECAPA embeddings.
 """
 
+import atexit
+import bisect
+import functools
+import hashlib
+import queue
+import threading
+import weakref
 import numpy as np
-from typing import Tuple, List, Dict, Optional
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple, List, Dict, Optional, Set
 from yova_shared import get_clean_logger
 
 from .profile_storage import ProfileStorage
 from .speaker_profile import SpeakerProfile
+from .similarity import similarity_matrix, quantize_int8, quantized_similarity_matrix, warm_up as warm_up_similarity
+
+
+# Number of recent verification results kept for repeated queries
+VERIFY_CACHE_SIZE = 128
+
+# Verification confidence levels: a score at or above CONFIDENCE_THRESHOLDS[i]
+# (and below the next threshold) maps to CONFIDENCE_LEVELS[i + 1]
+CONFIDENCE_THRESHOLDS = (0.4, 0.6)
+CONFIDENCE_LEVELS = ("low", "medium", "high")
+HIGH_CONFIDENCE_THRESHOLD = CONFIDENCE_THRESHOLDS[-1]
+
+
+def confidence_level(score: float) -> str:
+    """Map an aggregated similarity score to a confidence level with a single threshold lookup"""
+    return CONFIDENCE_LEVELS[bisect.bisect_right(CONFIDENCE_THRESHOLDS, score)]
+
+
+def confidence_levels(scores: np.ndarray) -> np.ndarray:
+    """Vectorized confidence_level for an array of scores"""
+    return np.asarray(CONFIDENCE_LEVELS)[np.searchsorted(CONFIDENCE_THRESHOLDS, scores, side='right')]
+
+
+def _run_save_worker(verifier_ref: "weakref.ref[SpeakerVerifier]", save_queue: "queue.Queue[Optional[str]]"):
+    """Background save loop; the verifier is only held while a save runs, so it can be garbage collected"""
+    while True:
+        speaker_id = save_queue.get()
+        try:
+            if speaker_id is None:
+                # Stop sentinel from close() or from the verifier being garbage collected
+                return
+            verifier = verifier_ref()
+            if verifier is None:
+                return
+            verifier._save_queued_profile(speaker_id)
+            del verifier
+        finally:
+            save_queue.task_done()
+
+
+def _close_at_exit(verifier_ref: "weakref.ref[SpeakerVerifier]"):
+    """atexit hook writing pending profile saves of a verifier that is still alive"""
+    verifier = verifier_ref()
+    if verifier is not None:
+        verifier.close()
 
 
 class SpeakerVerifier:
     """Speaker verification system using ECAPA embeddings with file-based storage"""
     
-    def __init__(self, logger, similarity_threshold: float = 0.267, storage_dir: str = None, top_k_mean: int = 3, decision_margin: float = 0.04):
+    def __init__(self, logger, similarity_threshold: float = 0.267, storage_dir: str = None, top_k_mean: int = 3, decision_margin: float = 0.04, quantize: bool = False):
         """
         Initialize speaker verifier
         
@@ -27,36 +81,158 @@ class SpeakerVerifier:
             storage_dir: Directory to store user profiles (relative to project root), or None to disable storage
             top_k_mean: Number of top similarities to consider for aggregation
             decision_margin: Minimum difference between highest and second-highest similarity for decision
-            storage_dir: Directory to store user profiles (relative to project root), or None to disable storage
-            top_k_mean: Number of top similarities to consider for aggregation
-            decision_margin: Minimum difference between highest and second-highest similarity for decision
+            quantize: Shortlist identification candidates against int8-quantized enrollment
+                embeddings, which reads 4x fewer bytes per query on large speaker banks. The best
+                two candidates and all verifications are scored at full precision
         """
         self.logger = get_clean_logger("speaker_verifier", logger)
         self.enrolled_speakers: Dict[str, SpeakerProfile] = {}
+        # Sample counts are kept alongside the profiles so totals are O(1)
+        self._sample_counts: Dict[str, int] = {}
+        self._total_samples = 0
         self.similarity_threshold = similarity_threshold
         # Scoring and decision parameters
         self.top_k_mean = max(1, int(top_k_mean))
         self.decision_margin = max(0.0, float(decision_margin))
+        self.quantize = bool(quantize)
+        # Compile any JIT scoring kernel now rather than on the first verification
+        warm_up_similarity()
         
         # Initialize storage layer
         self.storage = ProfileStorage(storage_dir)
         
-        # Load existing profiles if storage is enabled
+        # Profile writes are coalesced and performed by a background worker so that
+        # enrollment does not block on disk I/O
+        self._profiles_lock = threading.Lock()
+        self._save_queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._pending_saves: Set[str] = set()
+        self._save_thread = None
+        self._save_finalizer = None
+        self._atexit_hook = None
+        # Stacked enrollment matrix for batch identification, built lazily
+        self._speaker_matrix: Optional[Tuple[Optional[np.ndarray], List[str], np.ndarray, np.ndarray]] = None
+        # Recent verification results keyed by (test embedding digest, speaker_id, threshold, top_k_mean)
+        self._verify_cache: "OrderedDict[Tuple[bytes, str, float, int], Tuple[bool, float, str, float]]" = OrderedDict()
+        # Non-float32 inputs are logged once, not on every call
+        self._logged_dtype_conversion = False
         if self.storage.storage_enabled:
-            loaded_profiles = self.storage.load_all_profiles()
-            # Convert loaded profiles to SpeakerProfile objects
-            for speaker_id, embeddings in loaded_profiles.items():
-                profile = SpeakerProfile(speaker_id)
-                for embedding in embeddings:
-                    profile.add_embedding(embedding)
-                self.enrolled_speakers[speaker_id] = profile
+            # The worker and the exit hook only hold weak references, so an unused verifier is still
+            # garbage collected; collection stops the worker, and close() stops it explicitly
+            self._save_thread = threading.Thread(target=_run_save_worker, args=(weakref.ref(self), self._save_queue),
+                                                 name="speaker_profile_saver", daemon=True)
+            self._save_thread.start()
+            self._save_finalizer = weakref.finalize(self, self._save_queue.put, None)
+            self._save_finalizer.atexit = False
+            self._atexit_hook = functools.partial(_close_at_exit, weakref.ref(self))
+            atexit.register(self._atexit_hook)
+        
+        # Index existing profiles; they are loaded from disk on first access
+        self._disk_index: Dict[str, Path] = self.storage.index_profiles()
         
         self.logger.info(f"Speaker verifier initialized with threshold: {similarity_threshold}")
-        self.logger.info(f"Scoring: top_k_mean={self.top_k_mean}, decision_margin={self.decision_margin:.3f}")
+        self.logger.info(f"Scoring: top_k_mean={self.top_k_mean}, decision_margin={self.decision_margin:.3f}, quantize={self.quantize}")
         if self.storage.storage_enabled:
-            self.logger.info(f"Storage directory: {self.storage.storage_dir}")
+            self.logger.info(f"Storage directory: {self.storage.storage_dir} ({len(self._disk_index)} profiles on disk)")
         else:
             self.logger.info("File storage disabled")
+    
+    def _load_indexed_profile(self, profile_path: Path):
+        """Load an indexed profile file into memory"""
+        speaker_id, embeddings = self.storage.load_profile(profile_path)
+        if not speaker_id or not embeddings:
+            return
+        profile = SpeakerProfile(speaker_id)
+        profile.add_embeddings(embeddings)
+        with self._profiles_lock:
+            if speaker_id not in self.enrolled_speakers:
+                self.enrolled_speakers[speaker_id] = profile
+                self._set_sample_count(speaker_id, profile.get_sample_count())
+                self._invalidate_caches()
+    
+    def _set_sample_count(self, speaker_id: str, count: Optional[int]):
+        """Update the cached sample count of a speaker; None removes the speaker (call with lock held)"""
+        self._total_samples -= self._sample_counts.pop(speaker_id, 0)
+        if count is not None:
+            self._sample_counts[speaker_id] = count
+            self._total_samples += count
+    
+    def _ensure_loaded(self, speaker_id: str):
+        """Load a speaker's profile from disk if it has not been loaded yet"""
+        if speaker_id in self.enrolled_speakers or not self._disk_index:
+            return
+        profile_path = self._disk_index.pop(self.storage.get_profile_key(speaker_id), None)
+        if profile_path is not None:
+            self._load_indexed_profile(profile_path)
+    
+    def preload(self):
+        """
+        Load all profiles that are on disk but not yet in memory
+        
+        Called implicitly by operations that need every speaker, such as identification.
+        """
+        while self._disk_index:
+            _, profile_path = self._disk_index.popitem()
+            self._load_indexed_profile(profile_path)
+    
+    def _schedule_save(self, speaker_id: str):
+        """Queue a background save of a speaker's profile, coalescing repeated requests"""
+        if not self.storage.storage_enabled:
+            return
+        with self._profiles_lock:
+            closed = self._save_thread is None
+            if not closed:
+                if speaker_id in self._pending_saves:
+                    return
+                self._pending_saves.add(speaker_id)
+                # Queued under the lock so close() cannot slip its stop sentinel in first
+                self._save_queue.put(speaker_id)
+        if closed:
+            # Closed verifier: write synchronously
+            self._save_profile(speaker_id)
+    
+    def _save_queued_profile(self, speaker_id: str):
+        """Persist a speaker profile taken off the save queue (runs on the save worker)"""
+        with self._profiles_lock:
+            self._pending_saves.discard(speaker_id)
+        self._save_profile(speaker_id)
+    
+    def _save_profile(self, speaker_id: str):
+        """Write a speaker's current profile to disk, logging failures"""
+        try:
+            with self._profiles_lock:
+                profile = self.enrolled_speakers.get(speaker_id)
+                embeddings = profile.get_embeddings_for_storage() if profile is not None else None
+            # Speaker may have been cleared while the save was pending
+            if embeddings is not None:
+                self.storage.save_profile(speaker_id, embeddings)
+        except Exception as e:
+            self.logger.error(f"Background save failed for speaker {speaker_id}: {e}")
+    
+    def flush(self):
+        """
+        Block until all pending background profile saves are written to disk
+        """
+        if self._save_thread is not None:
+            self._save_queue.join()
+    
+    def close(self):
+        """
+        Write pending profile saves and stop the background save worker
+        
+        Later enrollments are saved synchronously. Safe to call more than once.
+        """
+        with self._profiles_lock:
+            save_thread = self._save_thread
+            self._save_thread = None
+        if save_thread is None:
+            return
+        # The stop sentinel is queued behind any pending saves, so they are written first
+        self._save_finalizer.detach()
+        self._save_queue.put(None)
+        save_thread.join()
+        atexit.unregister(self._atexit_hook)
+        self._atexit_hook = None
+    
     def save_all_profiles(self) -> int:
         """
         Save all speaker profiles to disk
@@ -64,7 +240,14 @@ class SpeakerVerifier:
         Returns:
             Number of profiles saved
         """
-        return self.storage.save_all_profiles(self.enrolled_speakers)
+        self.preload()
+        self.flush()
+        with self._profiles_lock:
+            profiles = {
+                speaker_id: profile.get_embeddings_for_storage()
+                for speaker_id, profile in self.enrolled_speakers.items()
+            }
+        return self.storage.save_all_profiles(profiles)
     
     def export_profile_metadata(self, output_file: str = None) -> Dict:
         """
@@ -76,7 +259,8 @@ class SpeakerVerifier:
         Returns:
             Dictionary containing profile metadata
         """
-        return self.storage.export_profile_metadata(self.enrolled_speakers, output_file)
+        self.preload()
+        return self.storage.export_profile_metadata(dict(self._sample_counts), output_file)
     
     def backup_profiles(self, backup_dir: str = None) -> bool:
         """
@@ -97,6 +281,7 @@ class SpeakerVerifier:
         Returns:
             Number of orphaned profiles removed
         """
+        self.preload()
         return self.storage.cleanup_orphaned_profiles(self.enrolled_speakers)
     
     def enroll_speaker(self, speaker_id: str, embedding: np.ndarray) -> bool:
@@ -110,14 +295,23 @@ class SpeakerVerifier:
         Returns:
             True if enrollment successful, False otherwise
         """
-        if speaker_id not in self.enrolled_speakers:
-            self.enrolled_speakers[speaker_id] = SpeakerProfile(speaker_id)
-        
-                # Add new embedding to the speaker's profile
-        if self.enrolled_speakers[speaker_id].add_embedding(embedding):
-            # Auto-save the profile
-            self.storage.save_profile(speaker_id, self.enrolled_speakers[speaker_id].get_embeddings_for_storage())
-            self.logger.debug(f"Speaker {speaker_id} now has {self.enrolled_speakers[speaker_id].get_sample_count()} samples")
+        embedding = self._as_float32(embedding)
+        # Extend the speaker's existing profile on disk rather than overwriting it
+        self._ensure_loaded(speaker_id)
+        with self._profiles_lock:
+            if speaker_id not in self.enrolled_speakers:
+                self.enrolled_speakers[speaker_id] = SpeakerProfile(speaker_id)
+            
+            # Add new embedding to the speaker's profile
+            added = self.enrolled_speakers[speaker_id].add_embedding(embedding)
+            if added:
+                self._set_sample_count(speaker_id, self._sample_counts.get(speaker_id, 0) + 1)
+                self._invalidate_caches()
+        
+        if added:
+            # Auto-save the profile in the background
+            self._schedule_save(speaker_id)
+            self.logger.debug(f"Speaker {speaker_id} now has {self._sample_counts[speaker_id]} samples")
             return True
         
         return False
@@ -126,12 +320,15 @@ class SpeakerVerifier:
         """
         Get the averaged embedding for a speaker
         
+        The returned vector is unit-norm and read-only.
+        
         Args:
             speaker_id: ID of the speaker
             
         Returns:
             Averaged embedding vector or None if speaker not found
         """
+        self._ensure_loaded(speaker_id)
         if speaker_id not in self.enrolled_speakers:
             return None
         
@@ -148,36 +345,115 @@ class SpeakerVerifier:
         Returns:
             Tuple of (is_match, similarity, confidence_level, confidence_score)
         """
+        self._ensure_loaded(speaker_id)
         if speaker_id not in self.enrolled_speakers:
             return False, 0.0, "unknown", 0.0
         
-        profile = self.enrolled_speakers[speaker_id]
-        if not profile.has_embeddings():
+        test_unit = self._to_unit(test_embedding)
+        if test_unit is None:
+            return False, 0.0, "unknown", 0.0
+        return self._verify_cached(test_unit, self._embedding_digest(test_unit), speaker_id)
+    
+    def _to_unit(self, test_embedding: np.ndarray) -> Optional[np.ndarray]:
+        """L2-normalize a test embedding into a contiguous float32 unit vector, None if it has zero norm"""
+        test_embedding = self._as_float32(test_embedding)
+        squared_norm = np.dot(test_embedding, test_embedding)
+        if not squared_norm > 0:
+            return None
+        return test_embedding / np.sqrt(squared_norm)
+    
+    def _as_float32(self, embeddings: np.ndarray) -> np.ndarray:
+        """Convert embeddings to contiguous float32, logging once if callers pass another dtype"""
+        embeddings = np.asarray(embeddings)
+        if embeddings.dtype != np.float32 and not self._logged_dtype_conversion:
+            self._logged_dtype_conversion = True
+            self.logger.debug(f"Converting {embeddings.dtype} embeddings to float32; pass float32 to avoid the copy")
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    def _to_units(self, test_embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """L2-normalize float32 test embedding rows; returns (units, valid) where zero rows stay zero and are not valid"""
+        # Row norms via einsum avoid np.linalg.norm dispatch overhead
+        squared_norms = np.einsum('ij,ij->i', test_embeddings, test_embeddings)
+        valid = squared_norms > 0
+        inverse_norms = np.zeros_like(squared_norms)
+        inverse_norms[valid] = 1.0 / np.sqrt(squared_norms[valid])
+        return test_embeddings * inverse_norms[:, np.newaxis], valid
+    
+    def _embedding_digest(self, test_unit: np.ndarray) -> bytes:
+        """Hash a test embedding for use in verification cache keys"""
+        return hashlib.blake2b(test_unit.tobytes(), digest_size=8).digest()
+    
+    def _verify_cached(self, test_unit: np.ndarray, digest: bytes, speaker_id: str) -> Tuple[bool, float, str, float]:
+        """Score a unit test embedding against a speaker, reusing cached results"""
+        # Repeated verify_speaker calls with the same embedding hit the cache. The scoring
+        # parameters are part of the key, so changing them never returns stale decisions
+        cache_key = (digest, speaker_id, self.similarity_threshold, self.top_k_mean)
+        # Scored under the lock so a result cannot be cached after enrollment invalidated it
+        with self._profiles_lock:
+            result = self._verify_cache.get(cache_key)
+            if result is not None:
+                self._verify_cache.move_to_end(cache_key)
+                return result
+            
+            result = self._verify_core(test_unit, speaker_id)
+            self._verify_cache[cache_key] = result
+            if len(self._verify_cache) > VERIFY_CACHE_SIZE:
+                self._verify_cache.popitem(last=False)
+        return result
+    
+    def _verify_core(self, test_unit: np.ndarray, speaker_id: str) -> Tuple[bool, float, str, float]:
+        """Score a float32 unit test embedding against an enrolled speaker's samples"""
+        profile = self.enrolled_speakers.get(speaker_id)
+        # The speaker may have been cleared since the caller looked it up
+        if profile is None or not profile.has_embeddings():
             return False, 0.0, "unknown", 0.0
         
-        # Compute similarities against all enrollment samples
-        similarities = []
-        for enrolled_embedding in profile.get_embeddings_list():
-            similarity = self._cosine_similarity(test_embedding, enrolled_embedding)
-            similarities.append(similarity)
+        # Compute similarities against all enrollment samples in a single kernel call. A single
+        # speaker is always scored at full precision, so the threshold applies to exact scores
+        similarities = self._score_samples(test_unit[np.newaxis, :], profile.get_embedding_matrix(), full_precision=True)[0]
         # Aggregate using top-k mean to reduce variance
-        if similarities:
-            sorted_sims = sorted(similarities, reverse=True)
-            k = min(self.top_k_mean, len(sorted_sims))
-            score = float(np.mean(sorted_sims[:k]))
-        else:
-            score = 0.0
+        k = min(self.top_k_mean, similarities.shape[0])
+        score = float(np.mean(np.partition(similarities, -k)[-k:]))
         is_match = score >= self.similarity_threshold
         
-        # Simple confidence based on aggregated score
-        if score >= 0.6:
-            confidence_level = "high"
-        elif score >= 0.4:
-            confidence_level = "medium"
-        else:
-            confidence_level = "low"
+        return is_match, score, confidence_level(score), score
+    
+    def verify_speakers(self, test_embeddings: np.ndarray, speaker_id: str) -> List[Tuple[bool, float, str, float]]:
+        """
+        Verify a batch of test embeddings against one enrolled speaker
+        
+        All similarities are computed with a single matrix product against the
+        speaker's enrollment samples; results match verify_speaker for each row.
         
-        return is_match, score, confidence_level, score
+        Args:
+            test_embeddings: Test embeddings, shape (batch_size, dimension)
+            speaker_id: ID of the speaker to verify against
+            
+        Returns:
+            List of (is_match, similarity, confidence_level, confidence_score) tuples,
+            one per test embedding
+        """
+        test_embeddings = self._as_float32(test_embeddings)
+        if test_embeddings.ndim == 1:
+            test_embeddings = test_embeddings[np.newaxis, :]
+        unknown = (False, 0.0, "unknown", 0.0)
+        self._ensure_loaded(speaker_id)
+        profile = self.enrolled_speakers.get(speaker_id)
+        if profile is None or not profile.has_embeddings():
+            return [unknown] * test_embeddings.shape[0]
+        
+        test_units, valid = self._to_units(test_embeddings)
+        similarities = self._score_samples(test_units, profile.get_embedding_matrix(), full_precision=True)
+        # Top-k mean per row, as in verify_speaker
+        k = min(self.top_k_mean, similarities.shape[1])
+        scores = np.partition(similarities, -k, axis=1)[:, -k:].mean(axis=1)
+        matches = scores >= self.similarity_threshold
+        levels = confidence_levels(scores)
+        
+        return [
+            (is_match, score, level, score) if is_valid else unknown
+            for is_match, score, level, is_valid in zip(matches.tolist(), scores.tolist(), levels.tolist(), valid.tolist())
+        ]
     
     def identify_speaker(self, test_embedding: np.ndarray) -> Tuple[Optional[str], float, str, float]:
         """
@@ -189,14 +465,210 @@ class SpeakerVerifier:
         Returns:
             Tuple of (speaker_id, similarity, confidence_level, confidence_score)
         """
+        # Score against all speakers at once through the stacked enrollment matrix
+        test_embedding = self._as_float32(test_embedding).reshape(1, -1)
+        return self.identify_speakers(test_embedding)[0]
+    
+    def identify_speakers(self, test_embeddings: np.ndarray) -> List[Tuple[Optional[str], float, str, float]]:
+        """
+        Identify the most likely speaker for each of a batch of test embeddings
+        
+        All similarities are computed with a single matrix product against the
+        stacked enrollment samples of every speaker, and the per-speaker top-k
+        means are reduced without a Python loop over speakers.
+        
+        Args:
+            test_embeddings: Test embeddings, shape (batch_size, dimension)
+            
+        Returns:
+            List of (speaker_id, similarity, confidence_level, confidence_score) tuples,
+            one per test embedding
+        """
+        test_embeddings = self._as_float32(test_embeddings)
+        if test_embeddings.ndim == 1:
+            test_embeddings = test_embeddings[np.newaxis, :]
+        self.preload()
         if not self.enrolled_speakers:
-            return None, 0.0, "unknown", 0.0
+            return [(None, 0.0, "unknown", 0.0)] * test_embeddings.shape[0]
+        
+        matrix, speaker_ids, starts, counts = self._get_speaker_matrix()
+        if matrix is None:
+            # Every enrolled speaker has an empty profile
+            return [self._decide_identity([(speaker_id, 0.0) for speaker_id in speaker_ids])] * test_embeddings.shape[0]
+        test_units, valid = self._to_units(test_embeddings)
+        similarities = self._score_samples(test_units, matrix)
+        
+        speaker_scores = np.zeros((similarities.shape[0], len(speaker_ids)))
+        has_samples = counts > 0
+        speaker_scores[:, has_samples] = self._segment_top_k_means(similarities, starts[has_samples], counts[has_samples])
+        if self.quantize:
+            speaker_scores = self._rescore_candidates(test_units, speaker_ids, speaker_scores)
+        
+        return self._decide_identities(speaker_ids, speaker_scores, valid)
+    
+    def _segment_top_k_means(self, similarities: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """
+        Top-k mean of each speaker's segment of columns in a flat score matrix
+        
+        Each pass takes the per-segment maximum with np.maximum.reduceat and knocks it out,
+        so memory stays proportional to the (batch, samples) score matrix no matter how
+        unevenly samples are spread across speakers.
+        
+        Args:
+            similarities: Scores, shape (batch_size, samples), speakers' samples stored contiguously
+            starts: First column of each speaker's segment; every segment is non-empty
+            counts: Number of columns in each segment
+            
+        Returns:
+            Mean of the top min(top_k_mean, count) scores per segment, shape (batch_size, speakers)
+        """
+        remaining = np.broadcast_to(np.minimum(self.top_k_mean, counts), (similarities.shape[0], len(counts))).copy()
+        sums = np.zeros(remaining.shape)
+        work = similarities.copy()
+        for _ in range(int(remaining.max(initial=0))):
+            segment_max = np.maximum.reduceat(work, starts, axis=1)
+            hits = work == np.repeat(segment_max, counts, axis=1)
+            # Tied maxima are taken together, up to each segment's remaining k
+            taken = np.minimum(np.add.reduceat(hits, starts, axis=1), remaining)
+            sums += np.where(taken > 0, segment_max, 0.0) * taken
+            remaining -= taken
+            work[hits] = -np.inf
+        return sums / np.minimum(self.top_k_mean, counts)
+    
+    def _rescore_candidates(self, test_units: np.ndarray, speaker_ids: List[str], speaker_scores: np.ndarray) -> np.ndarray:
+        """
+        Rescore the best and runner-up speakers of each row at full precision
+        
+        The int8 pass shortlists candidates; the scores that decide acceptance
+        (threshold) and ambiguity (decision margin) are then exact, so the
+        float32 threshold calibration still holds when quantizing.
+        
+        Args:
+            test_units: Unit-norm float32 test embeddings, shape (batch_size, dimension)
+            speaker_ids: Speaker IDs, one per score column
+            speaker_scores: Quantized scores, shape (batch_size, speaker_count)
+            
+        Returns:
+            Float32 scores of the two best candidates of each row; every other speaker is set
+            to -inf, so an int8 score can never win or act as the runner-up
+        """
+        candidates = np.argpartition(-speaker_scores, min(1, speaker_scores.shape[1] - 1), axis=1)[:, :2]
+        rows_index = np.arange(speaker_scores.shape[0])[:, np.newaxis]
+        rescored = np.full(speaker_scores.shape, -np.inf, dtype=np.float32)
+        # Candidates without samples keep their (zero) score
+        rescored[rows_index, candidates] = speaker_scores[rows_index, candidates]
+        for column in np.unique(candidates).tolist():
+            profile = self.enrolled_speakers[speaker_ids[column]]
+            rows = np.flatnonzero((candidates == column).any(axis=1))
+            if not profile.has_embeddings():
+                continue
+            similarities = self._score_samples(np.ascontiguousarray(test_units[rows]), profile.get_embedding_matrix(), full_precision=True)
+            k = min(self.top_k_mean, similarities.shape[1])
+            rescored[rows, column] = np.partition(similarities, -k, axis=1)[:, -k:].mean(axis=1)
+        return rescored
+    
+    def _decide_identities(self, speaker_ids: List[str], speaker_scores: np.ndarray,
+                           valid: np.ndarray) -> List[Tuple[Optional[str], float, str, float]]:
+        """
+        Vectorized _decide_identity over a batch of per-speaker score rows
+        
+        Args:
+            speaker_ids: Speaker IDs, one per score column
+            speaker_scores: Scores, shape (batch_size, speaker_count)
+            valid: Rows that have a usable test embedding; other rows are reported as unknown
+            
+        Returns:
+            List of (speaker_id, similarity, confidence_level, confidence_score) tuples
+        """
+        # argmax picks the first of equal scores, like the stable sort in _decide_identity
+        best_index = np.argmax(speaker_scores, axis=1)
+        best_scores = speaker_scores[np.arange(speaker_scores.shape[0]), best_index]
+        if len(speaker_ids) > 1:
+            second_scores = np.partition(speaker_scores, -2, axis=1)[:, -2]
+            decisive = (best_scores - second_scores) >= self.decision_margin
+        else:
+            decisive = np.ones_like(valid)
+        accepted = valid & decisive & (best_scores >= self.similarity_threshold)
+        levels = np.where(accepted, np.where(best_scores >= HIGH_CONFIDENCE_THRESHOLD, "high", "medium"), np.where(valid, "low", "unknown"))
+        
+        results = []
+        for index, score, level, is_accepted, is_valid in zip(best_index.tolist(), best_scores.tolist(), levels.tolist(), accepted.tolist(), valid.tolist()):
+            score = score if is_valid else 0.0
+            results.append((speaker_ids[index] if is_accepted else None, score, level, score))
+        return results
+    
+    def _get_speaker_matrix(self) -> Tuple[Optional[np.ndarray], List[str], np.ndarray, np.ndarray]:
+        """
+        Get enrollment samples of all speakers stacked into one matrix
         
-        # Collect scores for all speakers (top-k mean per speaker)
-        scores = []
-        for speaker_id in self.enrolled_speakers:
-            _, score, _, _ = self.verify_speaker(test_embedding, speaker_id)
-            scores.append((speaker_id, score))
+        The matrix is cached until any speaker's enrollment changes.
+        
+        Returns:
+            Tuple of (matrix, speaker_ids, starts, counts) where speaker_ids[i] owns the counts[i]
+            matrix rows from starts[i]; matrix is an (int8 matrix, scales) tuple when quantizing
+            and None if no speaker has samples
+        """
+        with self._profiles_lock:
+            if self._speaker_matrix is None:
+                speaker_ids = list(self.enrolled_speakers.keys())
+                profiles = [self.enrolled_speakers[speaker_id] for speaker_id in speaker_ids]
+                profiles_with_samples = [profile for profile in profiles if profile.has_embeddings()]
+                counts = np.array([profile.get_sample_count() for profile in profiles], dtype=np.int64)
+                starts = np.cumsum(counts) - counts
+                if not profiles_with_samples:
+                    matrix = None
+                elif self.quantize:
+                    # (int8 matrix, per-row scales)
+                    blocks = [self._profile_matrix(profile) for profile in profiles_with_samples]
+                    matrix = (np.concatenate([block for block, _ in blocks]), np.concatenate([scales for _, scales in blocks]))
+                else:
+                    matrix = np.concatenate([self._profile_matrix(profile) for profile in profiles_with_samples])
+                self._speaker_matrix = (matrix, speaker_ids, starts, counts)
+            return self._speaker_matrix
+    
+    def _profile_matrix(self, profile: SpeakerProfile):
+        """Get a profile's samples in the form used for identification scoring: float32 rows, or (int8 rows, scales) when quantizing"""
+        return profile.get_quantized_matrix() if self.quantize else profile.get_embedding_matrix()
+    
+    def _score_samples(self, test_units: np.ndarray, matrix, full_precision: bool = False) -> np.ndarray:
+        """
+        Compute similarities of unit test embeddings against enrollment samples
+        
+        Verification, identification and the rescoring of identification candidates
+        all score through here.
+        
+        Args:
+            test_units: Unit-norm float32 test embeddings, shape (batch_size, dimension)
+            matrix: Float32 enrollment samples, or (int8 rows, scales) from _profile_matrix
+                when quantizing
+            full_precision: Score float32 samples even when quantizing; verification and
+                candidate rescoring use this so thresholds apply to exact scores
+            
+        Returns:
+            Similarities, shape (batch_size, samples)
+        """
+        # Both sides are unit-norm, so dot products are cosine similarities
+        if self.quantize and not full_precision:
+            # int8 with per-vector scales; integer dot products are rescaled to cosines
+            test_quantized, test_scales = quantize_int8(test_units)
+            return quantized_similarity_matrix(test_quantized, test_scales, *matrix)
+        return similarity_matrix(test_units, matrix)
+    
+    def _invalidate_caches(self):
+        """Drop the cached enrollment matrix and verification results after enrollment changes"""
+        self._speaker_matrix = None
+        self._verify_cache.clear()
+    
+    def _decide_identity(self, scores: List[Tuple[str, float]]) -> Tuple[Optional[str], float, str, float]:
+        """
+        Pick the identified speaker from per-speaker scores
+        
+        Args:
+            scores: List of (speaker_id, score) tuples
+            
+        Returns:
+            Tuple of (speaker_id, similarity, confidence_level, confidence_score)
+        """
         if not scores:
             return None, 0.0, "low", 0.0
         # Sort by score descending
@@ -207,26 +679,13 @@ class SpeakerVerifier:
         # Threshold and decision margin check
         if best_score >= self.similarity_threshold:
             if len(scores) == 1 or (best_score - second_score) >= self.decision_margin:
-                confidence_level = "high" if best_score >= 0.6 else "medium"
+                confidence_level = "high" if best_score >= HIGH_CONFIDENCE_THRESHOLD else "medium"
                 return best_speaker, best_score, confidence_level, best_score
             # Ambiguous case: margin too small
             return None, best_score, "low", best_score
         
         return None, best_score, "low", best_score
     
-    def _cosine_similarity(self, emb1: np.ndarray, emb2: np.ndarray) -> float:
-        """
-        Calculate cosine similarity between two embeddings
-        
-        Args:
-            emb1: First embedding vector
-            emb2: Second embedding vector
-            
-        Returns:
-            Cosine similarity score between -1 and 1
-        """
-        return np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2))
-    
     def get_enrolled_speakers(self) -> List[str]:
         """
         Get list of enrolled speaker IDs
@@ -234,6 +693,7 @@ class SpeakerVerifier:
         Returns:
             List of speaker IDs
         """
+        self.preload()
         return list(self.enrolled_speakers.keys())
     
     def get_speaker_sample_count(self, speaker_id: str) -> int:
@@ -246,9 +706,8 @@ class SpeakerVerifier:
         Returns:
             Number of samples for the speaker
         """
-        if speaker_id not in self.enrolled_speakers:
-            return 0
-        return self.enrolled_speakers[speaker_id].get_sample_count()
+        self._ensure_loaded(speaker_id)
+        return self._sample_counts.get(speaker_id, 0)
     
     def get_total_samples(self) -> int:
         """
@@ -257,7 +716,8 @@ class SpeakerVerifier:
         Returns:
             Total sample count
         """
-        return sum(profile.get_sample_count() for profile in self.enrolled_speakers.values())
+        self.preload()
+        return self._total_samples
     
     def get_storage_stats(self) -> Dict:
         """
@@ -266,7 +726,8 @@ class SpeakerVerifier:
         Returns:
             Dictionary containing storage statistics
         """
-        return self.storage.get_storage_stats(self.enrolled_speakers)
+        self.preload()
+        return self.storage.get_storage_stats(dict(self._sample_counts))
     
     def profile_exists_on_disk(self, speaker_id: str) -> bool:
         """
@@ -290,12 +751,15 @@ class SpeakerVerifier:
         Returns:
             True if reload successful, False otherwise
         """
+        self._disk_index.pop(self.storage.get_profile_key(speaker_id), None)
         speaker_id_loaded, embeddings = self.storage.reload_profile(speaker_id)
         if speaker_id_loaded and embeddings:
             profile = SpeakerProfile(speaker_id)
-            for embedding in embeddings:
-                profile.add_embedding(embedding)
-            self.enrolled_speakers[speaker_id] = profile
+            profile.add_embeddings(embeddings)
+            with self._profiles_lock:
+                self.enrolled_speakers[speaker_id] = profile
+                self._set_sample_count(speaker_id, profile.get_sample_count())
+                self._invalidate_caches()
             return True
         return False
     
@@ -310,13 +774,19 @@ class SpeakerVerifier:
         Returns:
             True if sample removed successfully, False otherwise
         """
+        self._ensure_loaded(speaker_id)
         if speaker_id not in self.enrolled_speakers:
             return False
         
         profile = self.enrolled_speakers[speaker_id]
-        if profile.remove_embedding(index):
+        with self._profiles_lock:
+            removed = profile.remove_embedding(index)
+            if removed:
+                self._set_sample_count(speaker_id, profile.get_sample_count())
+                self._invalidate_caches()
+        if removed:
             # Auto-save the profile after modification
-            self.storage.save_profile(speaker_id, profile.get_embeddings_for_storage())
+            self._schedule_save(speaker_id)
             self.logger.info(f"Removed sample {index} from speaker {speaker_id}")
             return True
         
@@ -332,11 +802,17 @@ class SpeakerVerifier:
         Returns:
             True if speaker cleared successfully, False otherwise
         """
+        self._ensure_loaded(speaker_id)
         if speaker_id in self.enrolled_speakers:
-            del self.enrolled_speakers[speaker_id]
+            with self._profiles_lock:
+                del self.enrolled_speakers[speaker_id]
+                self._set_sample_count(speaker_id, None)
+                self._invalidate_caches()
             
             # Remove the profile file if storage is enabled
             if self.storage.storage_enabled:
+                # Let any in-flight save finish so it cannot recreate the file
+                self.flush()
                 self.storage.remove_profile_file(speaker_id)
             
             self.logger.info(f"Cleared all samples for speaker {speaker_id}")
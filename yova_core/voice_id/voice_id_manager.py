@@ -1,25 +1,41 @@
 from yova_shared import get_clean_logger
 from yova_core.voice_id.ecapa_model import ECAPAModel 
 from yova_core.voice_id.speaker_verifier import SpeakerVerifier
+import logging
 import numpy as np
 import time
 from pathlib import Path
+from typing import List
 
 SAMPLE_RATE = 16000
 
+
+def _to_float32_audio(audio: np.ndarray) -> np.ndarray:
+    """Convert PCM16 audio to float32 [-1, 1]; float audio is passed through without a round trip"""
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32767.0
+    return np.asarray(audio, dtype=np.float32)
+
 class VoiceIdManager:
-    def __init__(self, logger, users_path=None, model=None, similarity_threshold=0.267, decision_margin=0.04):
+    def __init__(self, logger, users_path=None, model=None, similarity_threshold=0.267, decision_margin=0.04, quantize=False):
         self.logger = get_clean_logger("voice_id_manager", logger)
 
         self.ecapa_model = model or ECAPAModel(logger)
         default_users_path = Path(__file__).parent.parent.parent / ".data" / "voice_id" / "users"
         self.users_path = users_path or default_users_path
-        self.speaker_verifier = SpeakerVerifier(logger, storage_dir=self.users_path, similarity_threshold=similarity_threshold, decision_margin=decision_margin)
+        self.speaker_verifier = SpeakerVerifier(logger, storage_dir=self.users_path, similarity_threshold=similarity_threshold, decision_margin=decision_margin, quantize=quantize)
+
 
+    def close(self):
+        """Write pending profile saves and stop the speaker verifier's background save worker"""
+        self.speaker_verifier.close()
 
     def enroll_speaker(self, speaker_id: str, pcm16_audio: np.ndarray):
-        float32_audio = pcm16_audio.astype(np.float32) / 32767.0
-        self.logger.debug(f"Converted to float32: range [{float32_audio.min():.3f}, {float32_audio.max():.3f}]")
+        """Enroll a speaker from PCM16 audio (float32 [-1, 1] audio is accepted as well)"""
+        float32_audio = _to_float32_audio(pcm16_audio)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            # The range scans the whole clip, so only compute it when it is logged
+            self.logger.debug(f"Converted to float32: range [{float32_audio.min():.3f}, {float32_audio.max():.3f}]")
         embedding = self.ecapa_model.extract_embedding(float32_audio, SAMPLE_RATE)
 
         if len(embedding) == 0:
@@ -28,9 +44,23 @@ class VoiceIdManager:
         self.speaker_verifier.enroll_speaker(speaker_id, embedding)
         self.logger.debug(f"Speaker enrolled: {speaker_id}")
         
+    def enroll_speakers(self, speaker_ids: List[str], pcm16_audios: List[np.ndarray]):
+        """Enroll several recordings (one speaker ID per recording) with batched embedding extraction"""
+        if len(speaker_ids) != len(pcm16_audios):
+            raise ValueError(f"Got {len(speaker_ids)} speaker IDs for {len(pcm16_audios)} recordings")
+        float32_audios = [_to_float32_audio(pcm16_audio) for pcm16_audio in pcm16_audios]
+        embeddings = self.ecapa_model.extract_embeddings_batch(float32_audios, SAMPLE_RATE)
+
+        for speaker_id, embedding in zip(speaker_ids, embeddings):
+            if len(embedding) == 0:
+                raise Exception(f"Failed to extract embedding for {speaker_id}")
+            self.speaker_verifier.enroll_speaker(speaker_id, embedding)
+        self.logger.debug(f"Enrolled {len(embeddings)} recordings")
+
     def identify_speaker(self, pcm16_audio: np.ndarray):
+        """Identify the speaker of PCM16 audio (float32 [-1, 1] audio is accepted as well)"""
         t0 = time.perf_counter()
-        float32_audio = pcm16_audio.astype(np.float32) / 32767.0
+        float32_audio = _to_float32_audio(pcm16_audio)
         embedding = self.ecapa_model.extract_embedding(float32_audio, SAMPLE_RATE)
 
         if len(embedding) == 0:
@@ -46,4 +76,30 @@ class VoiceIdManager:
             "confidence_level": confidence_level,
             "embedding": embedding,
             "processing_time": (t1 - t0)*1000
-        }
\ No newline at end of file
+        }
+
+    def identify_speakers(self, pcm16_audios: List[np.ndarray]) -> List[dict]:
+        """Identify speakers of several recordings with batched embedding extraction and a single scoring matrix product"""
+        if not pcm16_audios:
+            return []
+        t0 = time.perf_counter()
+        float32_audios = [_to_float32_audio(pcm16_audio) for pcm16_audio in pcm16_audios]
+        embeddings = self.ecapa_model.extract_embeddings_batch(float32_audios, SAMPLE_RATE)
+        if any(len(embedding) == 0 for embedding in embeddings):
+            raise Exception(f"Failed to extract embedding")
+
+        id_results = self.speaker_verifier.identify_speakers(np.stack(embeddings))
+        # Batch processing time is shared evenly across the recordings
+        processing_time = (time.perf_counter() - t0) * 1000 / len(embeddings)
+        self.logger.debug(f"Identified {len(embeddings)} recordings in {processing_time * len(embeddings):.1f}ms")
+
+        return [
+            {
+                "user_id": identified_speaker,
+                "similarity": similarity,
+                "confidence_level": confidence_level,
+                "embedding": embedding,
+                "processing_time": processing_time
+            }
+            for (identified_speaker, similarity, confidence_level, _), embedding in zip(id_results, embeddings)
+        ]